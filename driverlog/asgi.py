@@ -3,6 +3,9 @@ ASGI config for driverlog project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The async views under /api/async/ only pay off under an ASGI server, e.g.
+gunicorn driverlog.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
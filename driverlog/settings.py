@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'trips.middleware.ServerTimingMiddleware',  # first, so its total covers the other middleware
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -79,10 +80,32 @@ WSGI_APPLICATION = 'driverlog.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite connection profiles. 'production' is for several gunicorn workers on one file:
+# WAL lets readers run alongside the single writer, IMMEDIATE transactions take the write
+# lock up front (no failing lock upgrades), and writers wait up to `timeout` seconds for it
+# instead of raising "database is locked".
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)};"
+            'PRAGMA temp_store=MEMORY'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=float),
+    },
+}
+SQLITE_PROFILE = config('SQLITE_PROFILE', default='production')
+# Queue multi-row plan writes on a per-process lock (trips/db.py)
+SQLITE_SERIALIZE_WRITES = config('SQLITE_SERIALIZE_WRITES', default=True, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
@@ -90,8 +113,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson-backed, same output as the stock JSON classes; those are used when orjson isn't installed
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'trips.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'trips.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -104,6 +133,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['Server-Timing']
 
 
 
@@ -152,3 +182,100 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # External API configurations
 OPENROUTE_API_KEY = config('OPENROUTE_API_KEY', default='')
 MAPBOX_API_KEY = config('MAPBOX_API_KEY', default='')
+
+# Provider HTTP clients (trips/clients.py); timeouts are capped at the breaker's latency budget
+ORS_TIMEOUT = config('ORS_TIMEOUT', default=5, cast=float)
+NOMINATIM_TIMEOUT = config('NOMINATIM_TIMEOUT', default=3, cast=float)
+HTTP_POOL_MAXSIZE = config('HTTP_POOL_MAXSIZE', default=10, cast=int)
+# Open connections per async view's HTTP client (/api/async/...)
+ASYNC_HTTP_MAX_CONNECTIONS = config('ASYNC_HTTP_MAX_CONNECTIONS', default=100, cast=int)
+# Minimum seconds between requests to each host, per process; Nominatim's usage policy allows 1/s
+PROVIDER_MIN_INTERVALS = {
+    'api.openrouteservice.org': config('ORS_MIN_INTERVAL', default=0, cast=float),
+    'nominatim.openstreetmap.org': config('NOMINATIM_MIN_INTERVAL', default=1.0, cast=float),
+}
+
+# Circuit breakers around the providers (trips/breaker.py), shared by all workers through the database.
+# A call slower than latency_budget seconds counts as a failure even if it succeeds.
+CIRCUIT_BREAKERS = {
+    'ors': {
+        'failure_threshold': config('ORS_BREAKER_FAILURES', default=3, cast=int),
+        'reset_timeout': config('ORS_BREAKER_RESET', default=30, cast=float),  # seconds open before a probe
+        'latency_budget': config('ORS_LATENCY_BUDGET', default=5, cast=float),
+    },
+    'nominatim': {
+        'failure_threshold': config('NOMINATIM_BREAKER_FAILURES', default=3, cast=int),
+        'reset_timeout': config('NOMINATIM_BREAKER_RESET', default=30, cast=float),
+        'latency_budget': config('NOMINATIM_LATENCY_BUDGET', default=3, cast=float),
+    },
+}
+
+# Offline road graph (trips/roadgraph.py): a .npz from `manage.py build_road_graph`, or small GeoJSON.
+# Unset by default, so without a real graph the fallback is the straight-line estimate. For development,
+# trips/data/us_interstates_sample.geojson is a coarse city-to-city sample, not production coverage.
+# 'ors' routes with OpenRouteService and falls back to the graph; 'local' tries the graph first.
+ROUTING_PRIMARY = config('ROUTING_PRIMARY', default='ors')
+ROAD_GRAPH_PATH = config('ROAD_GRAPH_PATH', default='')
+ROAD_GRAPH_MAX_SNAP_MILES = config('ROAD_GRAPH_MAX_SNAP_MILES', default=30, cast=float)
+
+# Precomputed route detail levels, coarsest first: Douglas-Peucker tolerance in miles and the
+# highest web-map zoom each one serves for ?zoom=; above the last level's zoom the full route is sent
+ROUTE_DETAIL_LEVELS = {
+    'low': {'tolerance_miles': 0.5, 'max_zoom': 6},       # whole-state and wider views
+    'medium': {'tolerance_miles': 0.05, 'max_zoom': 10},  # regional views
+    'high': {'tolerance_miles': 0.005, 'max_zoom': 13},   # city views
+}
+
+# Batch trip planning (POST /api/trips/batch/)
+BATCH_PLANNING_MAX_TRIPS = config('BATCH_PLANNING_MAX_TRIPS', default=500, cast=int)
+BATCH_ROUTING_THREADS = config('BATCH_ROUTING_THREADS', default=8, cast=int)
+BATCH_PLANNING_PROCESSES = config('BATCH_PLANNING_PROCESSES', default=4, cast=int)  # 1 plans inline
+BATCH_PLANNING_POOL_MIN_TRIPS = config('BATCH_PLANNING_POOL_MIN_TRIPS', default=8, cast=int)
+
+# Rows fetched per round trip when streaming ELD log exports
+ELD_EXPORT_CHUNK_SIZE = config('ELD_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Persistent lookup caches (trips/cache.py)
+GEOCODE_CACHE_TTL = config('GEOCODE_CACHE_TTL', default=30 * 24 * 3600, cast=int)
+GEOCODE_CACHE_MAX_ENTRIES = config('GEOCODE_CACHE_MAX_ENTRIES', default=50000, cast=int)
+ROUTE_CACHE_TTL = config('ROUTE_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+ROUTE_CACHE_MAX_ENTRIES = config('ROUTE_CACHE_MAX_ENTRIES', default=5000, cast=int)
+ROUTE_CACHE_PRECISION = config('ROUTE_CACHE_PRECISION', default=3, cast=int)  # decimal places, ~110 m
+# Hit/miss counts are kept in memory and written after this many lookups or seconds, per process
+CACHE_STATS_FLUSH_LOOKUPS = config('CACHE_STATS_FLUSH_LOOKUPS', default=100, cast=int)
+CACHE_STATS_FLUSH_INTERVAL = config('CACHE_STATS_FLUSH_INTERVAL', default=10, cast=float)
+# Seconds between expiry/LRU sweeps, per process and cache; entries may overshoot max_entries meanwhile
+CACHE_EVICT_INTERVAL = config('CACHE_EVICT_INTERVAL', default=60, cast=float)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered trip JSON (trips/payloads.py); on disk so every worker process shares it
+    'trip_payloads': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('TRIP_PAYLOAD_CACHE_DIR', default=str(BASE_DIR / '.cache' / 'trip_payloads')),
+        'TIMEOUT': config('TRIP_PAYLOAD_CACHE_TTL', default=24 * 3600, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': config('TRIP_PAYLOAD_CACHE_MAX_ENTRIES', default=20000, cast=int)},
+    },
+}
+TRIP_PAYLOAD_CACHE = config('TRIP_PAYLOAD_CACHE', default='trip_payloads')  # a CACHES alias
+TRIP_PAYLOAD_CACHE_GZIP = config('TRIP_PAYLOAD_CACHE_GZIP', default=True, cast=bool)  # store pre-compressed
+TRIP_PAYLOAD_CACHE_GZIP_LEVEL = config('TRIP_PAYLOAD_CACHE_GZIP_LEVEL', default=6, cast=int)
+
+# Per-request timings: Server-Timing header plus one JSON line on the trips.perf logger
+SERVER_TIMING = config('SERVER_TIMING', default=True, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'trips': {
+            'handlers': ['console'],
+            'level': config('TRIPS_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
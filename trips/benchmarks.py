@@ -0,0 +1,200 @@
+# trips/benchmarks.py
+"""Reproducible micro-benchmarks for the planning and routing services.
+
+Every case is built from seeded synthetic data (routes of 10 to 100k points,
+trips of 1 to 20 days), so results from two runs of the same code differ
+only by machine noise. `run_suite` times each case and records the peak
+memory allocated during one traced run. `compare` checks a run against a
+saved baseline.
+"""
+import math
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .geo import RouteIndex, cumulative_miles
+from .models import Trip
+from .renderers import ORJSONRenderer
+from .services import ELDComplianceService, RouteCalculatorService
+
+BASELINE_VERSION = 1
+ROUTE_POINTS = (10, 1_000, 10_000, 100_000)
+TRIP_DAYS = (1, 5, 10, 20)
+AVERAGE_SPEED_MPH = 55
+MILES_PER_DAY = 500  # about what the HOS rules allow a single driver per calendar day
+LOCATE_CALLS = 1_000
+
+def synthetic_route(points: int, miles: float, seed: int = 0) -> List[List[float]]:
+    """A wandering west-bound polyline of `points` points and roughly `miles` length"""
+    rng = random.Random(seed)
+    step = miles / max(points - 1, 1) / 52.0  # degrees of longitude per point near 40N
+    lat, lng = 40.0, -75.0
+    coordinates = [[lat, lng]]
+    for _ in range(points - 1):
+        lat += rng.uniform(-0.3, 0.3) * step
+        lng -= step
+        coordinates.append([round(lat, 6), round(lng, 6)])
+    return coordinates
+
+def synthetic_trip(points: int, days: int) -> Trip:
+    miles = days * MILES_PER_DAY
+    coordinates = synthetic_route(points, miles, seed=points * 100 + days)
+    return Trip(
+        driver_id=1,
+        current_location={'lat': coordinates[0][0], 'lng': coordinates[0][1]},
+        pickup_location={'lat': coordinates[len(coordinates) // 4][0], 'lng': coordinates[len(coordinates) // 4][1]},
+        dropoff_location={'lat': coordinates[-1][0], 'lng': coordinates[-1][1]},
+        route_coordinates=coordinates,
+        route_cumulative_miles=cumulative_miles(coordinates).tolist(),
+        total_distance_miles=miles,
+        estimated_drive_time_hours=miles / AVERAGE_SPEED_MPH,
+        current_cycle_used_hours=20.0,
+        planned_departure=timezone.make_aware(datetime(2025, 1, 6, 8, 0))
+    )
+
+def synthetic_steps(count: int) -> List[Dict]:
+    rng = random.Random(count)
+    return [
+        {'instruction': f"Turn {'left' if i % 2 else 'right'} onto Route {i}", 'distance': rng.uniform(0.1, 30.0)}
+        for i in range(count)
+    ]
+
+def synthetic_trip_payload(points: int, days: int) -> Dict:
+    """Roughly what TripSerializer returns for a planned trip: a long route and a few logs per day"""
+    trip = synthetic_trip(points, days)
+    start = trip.planned_departure
+    logs = [
+        {
+            'id': i,
+            'duty_status': ('driving', 'on_duty', 'off_duty', 'sleeper_berth')[i % 4],
+            'start_time': (start + timedelta(hours=i * 6)).isoformat(),
+            'end_time': (start + timedelta(hours=i * 6 + 6)).isoformat(),
+            'location': {'lat': 40.0, 'lng': -75.0 - i * 0.1, 'address': f'Mile marker {i * 300}'},
+            'duration_hours': 6.0,
+            'log_date': (start + timedelta(hours=i * 6)).date(),
+        }
+        for i in range(days * 4)
+    ]
+    return {
+        'id': 1,
+        'status': 'planned',
+        'route_coordinates': trip.route_coordinates,
+        'total_distance_miles': trip.total_distance_miles,
+        'created_at': start,
+        'eld_logs': logs,
+    }
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    """(name, zero-argument callable) for every benchmark; setup happens here, not in the timed call"""
+    cases = []
+    eld_service = ELDComplianceService()
+    for points in ROUTE_POINTS:
+        for days in TRIP_DAYS:
+            trip = synthetic_trip(points, days)
+            cases.append((f"generate_compliance_plan[points={points},days={days}]",
+                          lambda trip=trip: eld_service.generate_compliance_plan(trip)))
+
+    # RouteIndex.locate took over from ELDComplianceService._interpolate_location
+    for points in ROUTE_POINTS:
+        trip = synthetic_trip(points, 5)
+        route_index = RouteIndex.for_trip(trip)
+        miles = np.linspace(0, trip.total_distance_miles, LOCATE_CALLS).tolist()
+        cases.append((f"route_locate_x{LOCATE_CALLS}[points={points}]",
+                      lambda route_index=route_index, miles=miles: [route_index.locate(m) for m in miles]))
+
+    route_service = RouteCalculatorService()
+    stops = ({'lat': 40.7, 'lng': -74.0}, {'lat': 41.8, 'lng': -87.6}, {'lat': 34.05, 'lng': -118.2})
+    cases.append(("calculate_fallback_route", lambda: route_service._calculate_fallback_route(*stops)))
+
+    # Response rendering, stock json against orjson; route_coordinates dominates large trips
+    renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+    for points in ROUTE_POINTS:
+        payload = synthetic_trip_payload(points, 5)
+        for name, renderer in renderers.items():
+            cases.append((f"render_trip[renderer={name},points={points}]",
+                          lambda renderer=renderer, payload=payload: renderer.render(payload)))
+
+    for count in ROUTE_POINTS:
+        steps = synthetic_steps(count)
+        cases.append((f"parse_instructions[steps={count}]",
+                      lambda steps=steps: route_service._parse_instructions(steps)))
+    return cases
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def measure(func: Callable, repeat: int, min_seconds: float) -> Dict:
+    """Latency percentiles over at least `repeat` runs (and `min_seconds` of running), plus peak allocation"""
+    func()  # warm-up: imports, lazy caches
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat or time.perf_counter() - started < min_seconds:
+        t0 = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+
+    # Traced separately: tracemalloc slows allocation-heavy code several times over
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': len(timings),
+        'min_ms': timings[0],
+        'p50_ms': percentile(timings, 0.50),
+        'p90_ms': percentile(timings, 0.90),
+        'p99_ms': percentile(timings, 0.99),
+        'mean_ms': statistics.fmean(timings),
+        'peak_kib': peak / 1024,
+    }
+
+def run_suite(repeat: int = 20, min_seconds: float = 0.2, name_filter: str = None, progress: Callable = None) -> Dict:
+    results = {}
+    for name, func in build_cases():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, repeat, min_seconds)
+        if progress:
+            progress(name, results[name])
+
+    return {
+        'version': BASELINE_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[Dict]:
+    """One row per case present in both runs; `regression` is set when p50 latency or peak
+    memory grew by more than `threshold` (0.2 = 20%)"""
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        latency_ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        memory_ratio = result['peak_kib'] / base['peak_kib'] if base['peak_kib'] else 1.0
+        rows.append({
+            'name': name,
+            'baseline_p50_ms': base['p50_ms'],
+            'p50_ms': result['p50_ms'],
+            'latency_ratio': latency_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': latency_ratio > 1 + threshold or memory_ratio > 1 + threshold,
+        })
+    return rows
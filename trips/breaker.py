@@ -0,0 +1,143 @@
+# trips/breaker.py
+"""Per-provider circuit breakers, with their state in the database so every worker shares it.
+
+closed -> open after `failure_threshold` consecutive failures; a call that succeeds
+but takes longer than `latency_budget` seconds counts as a failure too.
+open -> half_open once `reset_timeout` seconds have passed: the first caller to
+claim the probe makes one real call while everyone else keeps skipping.
+half_open -> closed if the probe succeeds within budget, back to open otherwise.
+Time spent queued in the per-host rate limiter (clients.HostRateLimiter) is not
+counted against the budget.
+
+Callers check `allow()` (or use `call()`) and go to their fallback when it says no.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .clients import queued_seconds
+from .models import ProviderCircuit
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """The provider's breaker is open; use the fallback, or tell the client to retry after `retry_after` seconds"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(name)
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, latency_budget: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = timedelta(seconds=reset_timeout)
+        self.latency_budget = latency_budget
+
+    def allow(self) -> bool:
+        """Whether to call the provider now; may claim the half-open probe for the caller"""
+        circuit = ProviderCircuit.objects.filter(name=self.name).values('state', 'opened_at', 'probe_started_at').first()
+        if circuit is None or circuit['state'] == 'closed':
+            return True
+
+        now = timezone.now()
+        if circuit['state'] == 'open' and now - circuit['opened_at'] < self.reset_timeout:
+            return False
+        # One worker wins the probe; a probe that never reported back is reclaimed after the timeout
+        return bool(ProviderCircuit.objects.filter(
+            Q(state='open', opened_at__lte=now - self.reset_timeout)
+            | Q(state='half_open', probe_started_at__lte=now - self.reset_timeout),
+            name=self.name
+        ).update(state='half_open', probe_started_at=now, updated_at=now))
+
+    def record_success(self):
+        # Filtered so a healthy provider costs no writes
+        ProviderCircuit.objects.filter(
+            Q(failures__gt=0) | ~Q(state='closed'),
+            name=self.name
+        ).update(state='closed', failures=0, opened_at=None, probe_started_at=None, updated_at=timezone.now())
+
+    def record_failure(self):
+        now = timezone.now()
+        reopened = ProviderCircuit.objects.filter(name=self.name, state='half_open').update(
+            state='open', opened_at=now, probe_started_at=None, updated_at=now
+        )
+        if reopened:
+            logger.warning("Circuit %s probe failed; open for another %ss", self.name, self.reset_timeout.total_seconds())
+            return
+
+        updated = ProviderCircuit.objects.filter(name=self.name, state='closed').update(
+            failures=F('failures') + 1, updated_at=now
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ProviderCircuit.objects.create(name=self.name, failures=1)
+            except IntegrityError:
+                pass  # another worker created it, or the circuit is already open
+        opened = ProviderCircuit.objects.filter(
+            name=self.name, state='closed', failures__gte=self.failure_threshold
+        ).update(state='open', opened_at=now, updated_at=now)
+        if opened:
+            logger.warning("Circuit %s opened after %s consecutive failures", self.name, self.failure_threshold)
+
+    def record(self, seconds: float, failed: bool):
+        if failed or seconds > self.latency_budget:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    @contextmanager
+    def call(self):
+        """Guard a provider call; raises CircuitOpen instead of running the block while open"""
+        if not self.allow():
+            raise CircuitOpen(self.name, self.reset_timeout.total_seconds())
+        started = self._clock()
+        try:
+            yield
+        except Exception:
+            self.record(self._clock() - started, failed=True)
+            raise
+        self.record(self._clock() - started, failed=False)
+
+    @asynccontextmanager
+    async def acall(self):
+        """call() for async code; the state queries run through sync_to_async"""
+        if not await sync_to_async(self.allow)():
+            raise CircuitOpen(self.name, self.reset_timeout.total_seconds())
+        started = self._clock()
+        try:
+            yield
+        except Exception:
+            await sync_to_async(self.record)(self._clock() - started, failed=True)
+            raise
+        await sync_to_async(self.record)(self._clock() - started, failed=False)
+    
+    @staticmethod
+    def _clock() -> float:
+        """Seconds for measuring a call's latency; stands still while the caller waits for a rate-limit slot"""
+        return time.perf_counter() - queued_seconds()
+
+    def status(self) -> dict:
+        circuit = ProviderCircuit.objects.filter(name=self.name).first()
+        return {
+            'name': self.name,
+            'state': circuit.state if circuit else 'closed',
+            'failures': circuit.failures if circuit else 0,
+            'opened_at': circuit.opened_at if circuit else None,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout_seconds': self.reset_timeout.total_seconds(),
+            'latency_budget_seconds': self.latency_budget,
+        }
+
+    def reset(self):
+        ProviderCircuit.objects.filter(name=self.name).delete()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(name, **settings.CIRCUIT_BREAKERS[name])
@@ -0,0 +1,190 @@
+# trips/cache.py
+import hashlib
+import re
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import CacheCounter, GeocodeCacheEntry, RouteCacheEntry
+
+class _PendingStats:
+    """Lookups counted in memory since the last flush"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.entry_hits = {}  # entry pk -> hits
+        self.touched = set()  # entry pks whose last_used_at is due for a refresh
+        self.since = time.monotonic()
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+# Per process, keyed by cache name: reads never write, and set() only evicts now and then
+_stats_lock = threading.Lock()
+_pending = {}
+_last_evicted = {}
+
+class PersistentCache:
+    """Database-backed lookup cache shared by every worker, with TTL expiry and LRU eviction
+
+    Hits and misses are counted in memory and written in one transaction every
+    CACHE_STATS_FLUSH_LOOKUPS lookups or CACHE_STATS_FLUSH_INTERVAL seconds, so a
+    cache hit is a single read. Counts not yet flushed are lost if the process exits.
+    """
+
+    # Don't rewrite last_used_at on every hit; LRU order only needs to be roughly right
+    TOUCH_INTERVAL = timedelta(minutes=5)
+
+    def __init__(self, name, model, ttl_seconds, max_entries):
+        self.name = name
+        self.model = model
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(label: str) -> str:
+        return hashlib.sha256(label.encode('utf-8')).hexdigest()
+
+    def get(self, label: str):
+        """Return (found, value); value may be None for a cached negative result"""
+        now = timezone.now()
+        entry = self.model.objects.filter(
+            key=self.make_key(label),
+            created_at__gt=now - self.ttl
+        ).only('id', 'value', 'last_used_at').first()
+
+        if entry is None:
+            self._count(misses=1)
+            return False, None
+
+        self._count(hits=1, entry_pk=entry.pk, touch=now - entry.last_used_at > self.TOUCH_INTERVAL)
+        return True, entry.value
+
+    def set(self, label: str, value):
+        now = timezone.now()
+        self.model.objects.update_or_create(
+            key=self.make_key(label),
+            defaults={'label': label, 'value': value, 'hits': 0, 'created_at': now, 'last_used_at': now}
+        )
+        if self._eviction_due():
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        self.model.objects.filter(created_at__lte=timezone.now() - self.ttl).delete()
+
+        overflow = self.model.objects.count() - self.max_entries
+        if overflow > 0:
+            stale_ids = self.model.objects.order_by('last_used_at').values_list('id', flat=True)[:overflow]
+            self.model.objects.filter(id__in=list(stale_ids)).delete()
+
+    def clear(self):
+        with _stats_lock:
+            _pending.pop(self.name, None)
+        self.model.objects.all().delete()
+        CacheCounter.objects.filter(name=self.name).delete()
+
+    def stats(self) -> dict:
+        self.flush()
+        counter = CacheCounter.objects.filter(name=self.name).first()
+        hits = counter.hits if counter else 0
+        misses = counter.misses if counter else 0
+        lookups = hits + misses
+
+        return {
+            'name': self.name,
+            'entries': self.model.objects.count(),
+            'max_entries': self.max_entries,
+            'ttl_seconds': int(self.ttl.total_seconds()),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+        }
+
+    def flush(self):
+        """Write this process's pending lookup counts"""
+        with _stats_lock:
+            pending = _pending.pop(self.name, None)
+        if pending is not None and pending.lookups:
+            self._write(pending)
+
+    def _count(self, hits=0, misses=0, entry_pk=None, touch=False):
+        with _stats_lock:
+            pending = _pending.setdefault(self.name, _PendingStats())
+            pending.hits += hits
+            pending.misses += misses
+            if entry_pk is not None:
+                pending.entry_hits[entry_pk] = pending.entry_hits.get(entry_pk, 0) + hits
+                if touch:
+                    pending.touched.add(entry_pk)
+
+            due = (pending.lookups >= settings.CACHE_STATS_FLUSH_LOOKUPS
+                   or time.monotonic() - pending.since >= settings.CACHE_STATS_FLUSH_INTERVAL)
+            if not due:
+                return
+            del _pending[self.name]
+        self._write(pending)
+
+    def _write(self, pending: _PendingStats):
+        # Entries hit the same number of times share one UPDATE
+        by_hits = {}
+        for pk, hits in pending.entry_hits.items():
+            by_hits.setdefault(hits, []).append(pk)
+
+        with transaction.atomic():
+            if pending.touched:
+                self.model.objects.filter(pk__in=pending.touched).update(last_used_at=timezone.now())
+            for hits, pks in by_hits.items():
+                self.model.objects.filter(pk__in=pks).update(hits=F('hits') + hits)
+            self._add_to_counter(pending.hits, pending.misses)
+
+    def _add_to_counter(self, hits, misses):
+        updated = CacheCounter.objects.filter(name=self.name).update(
+            hits=F('hits') + hits,
+            misses=F('misses') + misses
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    CacheCounter.objects.create(name=self.name, hits=hits, misses=misses)
+            except IntegrityError:
+                # Another worker created the row first
+                self._add_to_counter(hits, misses)
+
+    def _eviction_due(self) -> bool:
+        now = time.monotonic()
+        with _stats_lock:
+            last = _last_evicted.get(self.name)
+            if last is not None and now - last < settings.CACHE_EVICT_INTERVAL:
+                return False
+            _last_evicted[self.name] = now
+        return True
+
+def normalize_address(address: str) -> str:
+    address = re.sub(r'\s*,\s*', ', ', address.strip().casefold())
+    return ' '.join(address.split()).strip(' ,')
+
+def lane_key(current: dict, pickup: dict, dropoff: dict, precision: int = None) -> str:
+    """Route cache label: the three stops rounded to ROUTE_CACHE_PRECISION decimal places"""
+    if precision is None:
+        precision = settings.ROUTE_CACHE_PRECISION
+    
+    return '|'.join(
+        f"{round(point['lat'], precision):.{precision}f},{round(point['lng'], precision):.{precision}f}"
+        for point in (current, pickup, dropoff)
+    )
+
+# name -> (entry model, TTL setting, size setting)
+CACHES = {
+    'geocode': (GeocodeCacheEntry, 'GEOCODE_CACHE_TTL', 'GEOCODE_CACHE_MAX_ENTRIES'),
+    'route': (RouteCacheEntry, 'ROUTE_CACHE_TTL', 'ROUTE_CACHE_MAX_ENTRIES'),
+}
+
+def get_cache(name: str) -> PersistentCache:
+    model, ttl_setting, size_setting = CACHES[name]
+    return PersistentCache(name, model, getattr(settings, ttl_setting), getattr(settings, size_setting))
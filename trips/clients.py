@@ -0,0 +1,174 @@
+# trips/clients.py
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from django.conf import settings
+from geopy.adapters import RequestsAdapter
+from geopy.geocoders import Nominatim
+from openrouteservice import Client
+from openrouteservice.exceptions import ApiError
+from requests.adapters import HTTPAdapter
+from .instrumentation import timed
+
+# Seconds this context has spent queued for request slots; the circuit breakers
+# take it out of a provider call's latency
+_queued = contextvars.ContextVar('trips_rate_limit_queued', default=0.0)
+
+def queued_seconds() -> float:
+    return _queued.get()
+
+class HostRateLimiter:
+    """Spaces requests to each host at least `interval` seconds apart, across all threads in the process"""
+
+    def __init__(self, intervals: dict):
+        self.intervals = intervals
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str) -> float:
+        """Claim the host's next request slot; returns the seconds to wait for it"""
+        interval = self.intervals.get(host, 0)
+        if not interval:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        return slot - now
+
+    def wait(self, host: str):
+        delay = self.reserve(host)
+        if delay > 0:
+            _queued.set(_queued.get() + delay)
+            with timed('rate_limit_wait'):
+                time.sleep(delay)
+
+    async def await_slot(self, host: str):
+        delay = self.reserve(host)
+        if delay > 0:
+            _queued.set(_queued.get() + delay)
+            with timed('rate_limit_wait'):
+                await asyncio.sleep(delay)
+
+class RateLimitedHTTPAdapter(HTTPAdapter):
+    def __init__(self, rate_limiter: HostRateLimiter, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.rate_limiter.wait(urlsplit(request.url).hostname)
+        return super().send(request, **kwargs)
+
+class SingleAttemptClient(Client):
+    """openrouteservice client that doesn't retry 503s
+
+    The stock client retries them with backoff for up to retry_timeout (60s), holding the
+    request thread. A retry_timeout of 0 fails the first attempt too, since its check runs
+    before every attempt. A failing provider is the circuit breaker's to handle.
+    """
+
+    def request(self, url, get_params, first_request_time=None, retry_counter=0, requests_kwargs=None,
+                post_json=None, dry_run=None):
+        if retry_counter:
+            raise ApiError(503, "openrouteservice is unavailable; not retried")
+        return super().request(url, get_params, first_request_time, retry_counter, requests_kwargs, post_json, dry_run)
+
+class PooledRequestsAdapter(RequestsAdapter):
+    """geopy adapter that sends through the process-wide keep-alive session"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.session.close()
+        self.session = get_http_session()
+
+# Re-entrant: building the geolocator builds the session under the same lock
+_lock = threading.RLock()
+_pid = None
+_session = None
+_rate_limiter = None
+_ors_client = None
+_geolocator = None
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared between a gunicorn master and its workers
+    global _pid, _session, _rate_limiter, _ors_client, _geolocator
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _session = _rate_limiter = _ors_client = _geolocator = None
+
+def get_rate_limiter() -> HostRateLimiter:
+    global _rate_limiter
+    with _lock:
+        _reset_after_fork()
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter(settings.PROVIDER_MIN_INTERVALS)
+        return _rate_limiter
+
+def get_http_session() -> requests.Session:
+    global _session
+    rate_limiter = get_rate_limiter()
+    with _lock:
+        if _session is None:
+            adapter = RateLimitedHTTPAdapter(
+                rate_limiter,
+                pool_connections=len(settings.PROVIDER_MIN_INTERVALS) or 1,
+                pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                max_retries=0
+            )
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+def provider_timeout(name: str, timeout: float) -> float:
+    """Request timeout for a provider, at most its breaker's latency budget; a slower answer counts as a failure anyway"""
+    return min(timeout, settings.CIRCUIT_BREAKERS[name]['latency_budget'])
+
+def get_ors_client() -> Client:
+    global _ors_client
+    session = get_http_session()
+    with _lock:
+        if _ors_client is None:
+            client = SingleAttemptClient(
+                key=settings.OPENROUTE_API_KEY,
+                timeout=provider_timeout('ors', settings.ORS_TIMEOUT),
+                # Fail fast to the fallback instead of sleeping through 429 retries
+                retry_over_query_limit=False
+            )
+            client._session.close()
+            client._session = session
+            _ors_client = client
+        return _ors_client
+
+def get_geolocator() -> Nominatim:
+    global _geolocator
+    get_rate_limiter()
+    with _lock:
+        if _geolocator is None:
+            _geolocator = Nominatim(
+                user_agent="eld_app",
+                timeout=provider_timeout('nominatim', settings.NOMINATIM_TIMEOUT),
+                adapter_factory=PooledRequestsAdapter
+            )
+        return _geolocator
+
+async def _throttle(request: httpx.Request):
+    await get_rate_limiter().await_slot(request.url.host)
+
+def async_http_client() -> httpx.AsyncClient:
+    """A keep-alive client for one request, to use as `async with`; it shares the process-wide per-host rate limits
+    
+    Its connections belong to the event loop that opened them, and under WSGI every async
+    view runs on a loop of its own, so clients are not kept past the request.
+    """
+    return httpx.AsyncClient(
+        headers={'User-Agent': 'eld_app'},
+        limits=httpx.Limits(max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS),
+        event_hooks={'request': [_throttle]}
+    )
@@ -0,0 +1,35 @@
+# trips/db.py
+"""Short, serialized write transactions for SQLite.
+
+SQLite has one writer at a time. With the production profile (WAL, IMMEDIATE
+transactions, busy timeout; see SQLITE_PROFILES in settings) other processes'
+writers wait for the lock instead of failing. Within a process, write_transaction()
+also queues writers on a plain lock, so threads don't poll SQLite's busy handler
+against each other. Callers do their computation first and keep the block to
+the inserts.
+"""
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import transaction
+from .instrumentation import timed
+
+_write_lock = threading.Lock()
+
+@contextmanager
+def write_transaction(using=None):
+    connection = transaction.get_connection(using)
+    # Inside an atomic block the connection already holds (or will wait on) SQLite's lock;
+    # taking the process lock as well could deadlock against a thread that has it
+    if connection.vendor != 'sqlite' or connection.in_atomic_block or not settings.SQLITE_SERIALIZE_WRITES:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    with timed('write_wait'):
+        _write_lock.acquire()
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        _write_lock.release()
@@ -0,0 +1,59 @@
+# trips/exports.py
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import ELDLog
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_FIELDS = [
+    'id', 'driver_id', 'trip_id', 'log_date', 'duty_status',
+    'start_time', 'end_time', 'duration_hours', 'location', 'remarks'
+]
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def export_rows(driver_ids=None, start_date=None, end_date=None):
+    """Yield ELD log rows as tuples of EXPORT_FIELDS, fetched in chunks rather than all at once
+
+    Rows come in (driver, log_date, start_time) order, which eldlog_driver_order_idx serves.
+    """
+    queryset = ELDLog.objects.all()
+    if driver_ids:
+        queryset = queryset.filter(driver_id__in=driver_ids)
+    if start_date:
+        queryset = queryset.filter(log_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(log_date__lte=end_date)
+
+    queryset = queryset.order_by('driver_id', 'log_date', 'start_time', 'id').values_list(*EXPORT_FIELDS)
+    # A server-side cursor where the backend has them, fetchmany() batches otherwise
+    return queryset.iterator(chunk_size=settings.ELD_EXPORT_CHUNK_SIZE)
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller"""
+
+    def write(self, value):
+        return value
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    location = EXPORT_FIELDS.index('location')
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = list(row)
+        if row[location] is not None:
+            row[location] = json.dumps(row[location])
+        yield writer.writerow(row)
+
+def export_lines(export_format: str, rows):
+    if export_format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
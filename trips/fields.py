@@ -0,0 +1,141 @@
+# trips/fields.py
+import json
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+PACKED_FORMAT_VERSION = 1
+COORDINATE_SCALE = 10 ** 6  # microdegrees, ~0.1 m
+DISTANCE_SCALE = 1000  # thousandths of a mile, ~1.6 m
+
+def encode_coordinates(coordinates) -> bytes:
+    """[[lat, lng], ...] -> version byte + zlib(delta-encoded little-endian int32 microdegrees)"""
+    deltas = array('i')
+    prev_lat = prev_lng = 0
+    for lat, lng in coordinates:
+        lat = round(lat * COORDINATE_SCALE)
+        lng = round(lng * COORDINATE_SCALE)
+        deltas.append(lat - prev_lat)
+        deltas.append(lng - prev_lng)
+        prev_lat, prev_lng = lat, lng
+
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+    return bytes([PACKED_FORMAT_VERSION]) + zlib.compress(deltas.tobytes())
+
+def decode_coordinates(packed: bytes) -> list:
+    if packed[0] != PACKED_FORMAT_VERSION:
+        raise ValueError(f"Unknown packed coordinate format {packed[0]}")
+
+    deltas = array('i')
+    deltas.frombytes(zlib.decompress(packed[1:]))
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+
+    lats = accumulate(deltas[0::2])
+    lngs = accumulate(deltas[1::2])
+    return [[lat / COORDINATE_SCALE, lng / COORDINATE_SCALE] for lat, lng in zip(lats, lngs)]
+
+def encode_distances(values) -> bytes:
+    """[miles, ...] -> version byte + zlib(delta-encoded little-endian int32 thousandths of a mile)"""
+    deltas = array('i')
+    prev = 0
+    for value in values:
+        value = round(value * DISTANCE_SCALE)
+        deltas.append(value - prev)
+        prev = value
+
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+    return bytes([PACKED_FORMAT_VERSION]) + zlib.compress(deltas.tobytes())
+
+def decode_distances(packed: bytes) -> list:
+    if packed[0] != PACKED_FORMAT_VERSION:
+        raise ValueError(f"Unknown packed distance format {packed[0]}")
+
+    deltas = array('i')
+    deltas.frombytes(zlib.decompress(packed[1:]))
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+
+    return [value / DISTANCE_SCALE for value in accumulate(deltas)]
+
+class PackedDescriptor(DeferredAttribute):
+    """Keeps the raw bytes loaded from the database until the attribute is first read"""
+
+    # A data descriptor, so reads still come through __get__ once the value is in __dict__
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, bytes):
+            value = self.field.decode(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+class PackedArrayField(models.BinaryField):
+    """Base for lists stored as compact blobs; subclasses provide encode() and decode()"""
+
+    descriptor_class = PackedDescriptor
+
+    def encode(self, value) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, packed: bytes):
+        raise NotImplementedError
+
+    def get_packed(self, instance):
+        """The stored bytes for `instance`, without decoding them"""
+        value = instance.__dict__.get(self.attname)
+        if value is None or isinstance(value, bytes):
+            return value
+        return self.encode(value)
+
+    def pre_save(self, model_instance, add):
+        # Untouched values go back as the bytes that were loaded, skipping a decode/encode cycle
+        return self.get_packed(model_instance)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is not None and not isinstance(value, (bytes, memoryview)):
+            value = self.encode(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, memoryview):
+            return value.tobytes()
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return self.decode(bytes(value))
+        if isinstance(value, str):
+            return json.loads(value)  # from value_to_string(), e.g. loaddata
+        return value
+
+    def value_to_string(self, obj):
+        """The decoded list as JSON, for dumpdata and the other serializers"""
+        return json.dumps(self.value_from_object(obj))
+
+class PackedCoordinatesField(PackedArrayField):
+    """A list of [lat, lng] pairs stored as a compact delta-encoded blob"""
+
+    def encode(self, value):
+        return encode_coordinates(value)
+
+    def decode(self, packed):
+        return decode_coordinates(packed)
+
+class PackedDistancesField(PackedArrayField):
+    """A non-decreasing list of mileages, e.g. cumulative distance along a route"""
+
+    def encode(self, value):
+        return encode_distances(value)
+
+    def decode(self, packed):
+        return decode_distances(packed)
@@ -0,0 +1,162 @@
+# trips/geo.py
+"""Vectorized distance math over coordinate arrays.
+
+All functions take latitudes/longitudes in degrees as scalars or NumPy arrays
+(broadcast against each other) and return miles or degrees.
+
+Accuracy against geopy.distance.geodesic (Karney, WGS-84):
+- haversine_miles uses a sphere of mean radius; error is up to about 0.56% of
+  the distance worldwide and under 0.4% within the contiguous US, worst for
+  short north-south legs near the southern edge, where the meridional radius
+  is smallest.
+- geodesic_miles uses Lambert's formula on WGS-84; error stays under 20 m
+  for legs up to 5,000 miles and under 1 m for legs under 100 miles.
+"""
+import numpy as np
+from typing import Dict, List
+
+EARTH_RADIUS_MILES = 3958.7613  # mean radius
+WGS84_A_MILES = 6378137.0 / 1609.344
+WGS84_F = 1 / 298.257223563
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.subtract(lng2, lng1))
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def geodesic_miles(lat1, lng1, lat2, lng2):
+    """Ellipsoidal (WGS-84) distance by Lambert's formula"""
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    d_lambda = np.radians(np.subtract(lng2, lng1))
+
+    # Central angle between the reduced-latitude points
+    h = np.sin((beta2 - beta1) / 2) ** 2 + np.cos(beta1) * np.cos(beta2) * np.sin(d_lambda / 2) ** 2
+    sigma = 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (sigma - np.sin(sigma)) * (np.sin(p) * np.cos(q)) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * (np.cos(p) * np.sin(q)) ** 2 / np.sin(sigma / 2) ** 2
+        distance = WGS84_A_MILES * (sigma - WGS84_F / 2 * (x + y))
+    return np.where(sigma > 0, distance, 0.0)
+
+def bearing_degrees(lat1, lng1, lat2, lng2):
+    """Initial great-circle bearing, 0-360 clockwise from north"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_lambda = np.radians(np.subtract(lng2, lng1))
+    x = np.sin(d_lambda) * np.cos(phi2)
+    y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(d_lambda)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+def segment_miles(coordinates, ellipsoidal: bool = False) -> np.ndarray:
+    """Length of each segment of a [[lat, lng], ...] polyline"""
+    points = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    if len(points) < 2:
+        return np.zeros(0)
+    distance = geodesic_miles if ellipsoidal else haversine_miles
+    return distance(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+
+def cumulative_miles(coordinates, ellipsoidal: bool = False) -> np.ndarray:
+    """Distance from the first point to each point of a [[lat, lng], ...] polyline"""
+    if len(coordinates) == 0:
+        return np.zeros(0)
+    return np.concatenate(([0.0], np.cumsum(segment_miles(coordinates, ellipsoidal))))
+
+def route_length_miles(coordinates, ellipsoidal: bool = False) -> float:
+    return float(segment_miles(coordinates, ellipsoidal).sum())
+
+class RouteIndex:
+    """Locates points along a route by mileage with a binary search over cumulative distance
+
+    `route_miles` is the trip distance the planner works in (the provider's road
+    distance); mileages are mapped proportionally onto the geometry's own length.
+    """
+
+    def __init__(self, coordinates: List, cumulative: List[float] = None, route_miles: float = None):
+        self.coordinates = np.asarray(coordinates if coordinates else [], dtype=float).reshape(-1, 2)
+        if cumulative is None or len(cumulative) != len(self.coordinates):
+            cumulative = cumulative_miles(self.coordinates)
+        self.cumulative = np.asarray(cumulative, dtype=float)
+        self.length_miles = float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+        self.route_miles = route_miles or self.length_miles
+
+    @classmethod
+    def for_trip(cls, trip) -> 'RouteIndex':
+        return cls(trip.route_coordinates, trip.route_cumulative_miles, trip.total_distance_miles)
+
+    def locate(self, miles: float) -> Dict:
+        """Point on the route `miles` into the trip"""
+        if not len(self.coordinates):
+            return {'lat': 0, 'lng': 0, 'address': 'Route location'}
+
+        if miles <= 0 or self.length_miles <= 0:
+            return self._point(self.coordinates[0], 'Route location')
+        if miles >= self.route_miles:
+            return self._point(self.coordinates[-1], 'Route location')
+
+        target = miles * self.length_miles / self.route_miles
+        i = int(np.searchsorted(self.cumulative, target))
+        start, end = self.cumulative[i - 1], self.cumulative[i]
+        t = (target - start) / (end - start) if end > start else 0.0
+        a, b = self.coordinates[i - 1], self.coordinates[i]
+
+        return {
+            'lat': float(a[0] + (b[0] - a[0]) * t),
+            'lng': float(a[1] + (b[1] - a[1]) * t),
+            'address': f'Mile marker {int(miles)}'
+        }
+
+    def miles_to(self, point: Dict) -> float:
+        """Trip miles at the route point nearest to `point` ({'lat': ..., 'lng': ...})"""
+        if not len(self.coordinates) or self.length_miles <= 0:
+            return 0.0
+        distances = haversine_miles(self.coordinates[:, 0], self.coordinates[:, 1], point['lat'], point['lng'])
+        i = int(np.argmin(distances))
+        return float(self.cumulative[i]) * self.route_miles / self.length_miles
+    
+    @staticmethod
+    def _point(coord, address: str) -> Dict:
+        return {'lat': float(coord[0]), 'lng': float(coord[1]), 'address': address}
+
+def simplify(coordinates, tolerance_miles: float) -> List:
+    """Douglas-Peucker simplification of a [[lat, lng], ...] polyline
+
+    Points are projected onto a local equirectangular plane in miles, which is
+    accurate to well under 1% for the tolerances used on map zoom levels.
+    """
+    points = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    if len(points) < 3 or tolerance_miles <= 0:
+        return points.tolist()
+
+    scale = np.radians(1.0) * EARTH_RADIUS_MILES
+    y = points[:, 0] * scale
+    x = points[:, 1] * scale * np.cos(np.radians(points[:, 0].mean()))
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        length = np.hypot(dx, dy)
+        if length > 0:
+            distances = np.abs(px * dy - py * dx) / length
+        else:
+            distances = np.hypot(px, py)
+
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance_miles:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return points[keep].tolist()
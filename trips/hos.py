@@ -0,0 +1,235 @@
+# trips/hos.py
+"""Discrete-event Hours of Service simulation for property-carrying drivers.
+
+HOSSimulator walks a trip's timeline once, from departure to the end of the
+dropoff. Each step drives until the nearest of: the next stop on the route,
+the 11-hour driving limit, the end of the 14-hour window, the 8 hours of
+driving that call for a 30-minute break, the 70-hour cycle, or midnight. The
+limit that was hit decides the next event: a break, a 10-hour rest, a 34-hour
+restart, or a fuel, pickup or dropoff stop.
+
+Simplifications:
+- Cycle hours from before the trip do not roll off during it, so a long trip
+  may take its 34-hour restart a little earlier than strictly required.
+- Driving is also capped at 11 hours per calendar day, the rule ELDLog.clean
+  applies to stored logs.
+- A 30-minute break may be off duty or on duty not driving (fuel, pickup).
+"""
+import math
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List
+
+EPSILON = 1e-6
+
+class HOSSimulator:
+    MAX_DRIVING_HOURS = 11
+    MAX_WINDOW_HOURS = 14
+    DRIVING_BEFORE_BREAK = 8
+    BREAK_HOURS = 0.5
+    MIN_OFF_DUTY_HOURS = 10
+    MAX_CYCLE_HOURS = 70  # 8-day cycle
+    RESTART_HOURS = 34
+    MAX_DAILY_DRIVING_HOURS = 11  # per calendar day
+    FUEL_INTERVAL_MILES = 1000
+    FUEL_HOURS = 0.5
+    PRE_TRIP_HOURS = 1.0
+    PICKUP_HOURS = 1.0
+    DROPOFF_HOURS = 1.0
+
+    @classmethod
+    def rested_departure(cls, end: datetime) -> datetime:
+        """Earliest departure for another trip after duty ending at `end`, on the quarter hour
+
+        Each simulation starts with a rested driver and no driving logged that day, so the
+        next trip waits for a 10-hour rest and for the next calendar day, whichever is later.
+        """
+        next_day = (end + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        departure = max(end + timedelta(hours=cls.MIN_OFF_DUTY_HOURS), next_day)
+        if departure.second or departure.microsecond:
+            departure = departure.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        return departure + timedelta(minutes=-departure.minute % 15)
+
+    def __init__(self, locate: Callable[[float], Dict] = None):
+        """`locate(miles)` gives the location dict for a point on the route, e.g. RouteIndex.locate"""
+        self.locate = locate or (lambda miles: None)
+
+    def simulate(self, departure: datetime, distance_miles: float, drive_hours: float,
+                 cycle_hours_used: float = 0.0, pickup_miles: float = 0.0) -> Dict:
+        """Duty segments and stops from departure through the dropoff
+
+        Returns {'eld_logs', 'rest_stops', 'arrival', 'driving_hours', 'on_duty_hours',
+        'cycle_hours_used'}; logs and stops are dicts ready for ELDLog / RestStop.
+        """
+        run = _Run(self, departure, cycle_hours_used)
+        speed = distance_miles / drive_hours if drive_hours and distance_miles else 0.0
+
+        waypoints = [(min(max(pickup_miles, 0.0), distance_miles), 'pickup')]
+        fuel_miles = self.FUEL_INTERVAL_MILES
+        while fuel_miles < distance_miles:
+            waypoints.append((fuel_miles, 'fuel'))
+            fuel_miles += self.FUEL_INTERVAL_MILES
+        waypoints.append((distance_miles, 'dropoff'))
+        waypoints.sort(key=lambda waypoint: waypoint[0])
+
+        run.work(self.PRE_TRIP_HOURS, 'Pre-trip inspection and trip planning')
+        for target, kind in waypoints:
+            if speed:
+                run.drive_to(target, speed)
+            run.mile = target
+
+            if kind == 'pickup':
+                run.work(self.PICKUP_HOURS, 'Pickup', 'pickup', 'Loading at pickup location')
+            elif kind == 'fuel':
+                run.work(self.FUEL_HOURS, 'Fueling', 'fuel', 'Fuel stop (every 1000 miles)')
+            else:
+                run.work(self.DROPOFF_HOURS, 'Dropoff', 'dropoff', 'Unloading at dropoff location')
+
+        return {
+            'eld_logs': run.logs,
+            'rest_stops': run.stops,
+            'arrival': run.at(run.clock),
+            'driving_hours': run.driving_hours,
+            'on_duty_hours': run.on_duty_hours,
+            'cycle_hours_used': run.cycle,
+        }
+
+class _Run:
+    """Mutable state of one simulation; the clock is in hours since departure"""
+
+    def __init__(self, simulator: HOSSimulator, departure: datetime, cycle_hours_used: float):
+        self.sim = simulator
+        self.departure = departure
+        time_of_day = departure - departure.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.first_midnight = 24 - time_of_day.total_seconds() / 3600
+
+        self.clock = 0.0
+        self.mile = 0.0
+        self.cycle = cycle_hours_used
+
+        # The driver starts the trip rested
+        self.shift_start = 0.0
+        self.shift_driving = 0.0
+        self.driving_since_break = 0.0
+        self.driving_day = 0
+        self.day_driving = 0.0
+
+        self.driving_hours = 0.0
+        self.on_duty_hours = 0.0
+        self.logs: List[Dict] = []
+        self.stops: List[Dict] = []
+        self._last_log_end = None
+
+    def at(self, hours: float) -> datetime:
+        return self.departure + timedelta(seconds=round(hours * 3600))
+
+    def day_of(self, hours: float) -> int:
+        """Calendar day index, 0 being the departure date; a hair before midnight is the next day"""
+        return math.floor((hours - self.first_midnight + EPSILON) / 24) + 1
+
+    def until_midnight(self, hours: float) -> float:
+        return self.first_midnight + 24 * self.day_of(hours) - hours
+
+    def drive_to(self, target_miles: float, speed: float):
+        sim = self.sim
+        while target_miles - self.mile > EPSILON:
+            day_driving = self.day_driving if self.day_of(self.clock) == self.driving_day else 0.0
+            cycle_left = sim.MAX_CYCLE_HOURS - self.cycle
+            shift_left = min(
+                sim.MAX_DRIVING_HOURS - self.shift_driving,
+                self.shift_start + sim.MAX_WINDOW_HOURS - self.clock
+            )
+            day_left = sim.MAX_DAILY_DRIVING_HOURS - day_driving
+            break_left = sim.DRIVING_BEFORE_BREAK - self.driving_since_break
+
+            if cycle_left <= EPSILON:
+                self.rest(sim.RESTART_HOURS, '34-hour restart (70-hour cycle reached)')
+            elif day_left <= EPSILON:
+                # Long enough to also reset the shift, and always ends on a new day
+                hours = max(sim.MIN_OFF_DUTY_HOURS, self.until_midnight(self.clock))
+                self.rest(hours, 'Rest until the next day (11 hours of driving per calendar day)')
+            elif shift_left <= EPSILON:
+                self.rest(sim.MIN_OFF_DUTY_HOURS, 'Mandatory 10-hour rest (11-hour driving or 14-hour window limit)')
+            elif break_left <= EPSILON:
+                self.rest(sim.BREAK_HOURS, '30-minute break required after 8 hours driving', stop_type='break')
+            else:
+                step = min(
+                    cycle_left, shift_left, day_left, break_left,
+                    (target_miles - self.mile) / speed,
+                    self.until_midnight(self.clock)
+                )
+                self.drive(step, speed)
+
+    def drive(self, hours: float, speed: float):
+        day = self.day_of(self.clock)
+        if day != self.driving_day:
+            self.driving_day = day
+            self.day_driving = 0.0
+
+        self.record('driving', hours, 'Driving')
+        self.mile += hours * speed
+        self.shift_driving += hours
+        self.driving_since_break += hours
+        self.day_driving += hours
+        self.driving_hours += hours
+
+    def work(self, hours: float, remarks: str, stop_type: str = None, reason: str = ''):
+        if stop_type:
+            self.add_stop(stop_type, hours, reason, is_mandatory=False)
+        self.record('on_duty', hours, remarks)
+        if hours >= self.sim.BREAK_HOURS:
+            self.driving_since_break = 0.0
+
+    def rest(self, hours: float, reason: str, stop_type: str = 'rest'):
+        self.add_stop(stop_type, hours, reason, is_mandatory=True)
+        self.record('off_duty', hours, reason)
+
+        self.driving_since_break = 0.0
+        if hours >= self.sim.MIN_OFF_DUTY_HOURS:
+            self.shift_start = self.clock
+            self.shift_driving = 0.0
+        if hours >= self.sim.RESTART_HOURS:
+            self.cycle = 0.0
+
+    def add_stop(self, stop_type: str, hours: float, reason: str, is_mandatory: bool):
+        self.stops.append({
+            'stop_type': stop_type,
+            'location': self.sim.locate(self.mile),
+            'scheduled_arrival': self.at(self.clock),
+            'duration_hours': hours,
+            'distance_from_start_miles': self.mile,
+            'is_mandatory': is_mandatory,
+            'hos_reason': reason
+        })
+
+    def record(self, duty_status: str, hours: float, remarks: str):
+        """Log `hours` of `duty_status` from the clock on, split at midnight"""
+        if duty_status != 'off_duty':
+            self.cycle += hours
+            self.on_duty_hours += hours
+
+        while hours > EPSILON:
+            span = min(hours, self.until_midnight(self.clock))
+            start = self.at(self.clock)
+            last = self.logs[-1] if self.logs else None
+            if (last and last['duty_status'] == duty_status and last['remarks'] == remarks
+                    and self._last_log_end == self.clock and last['log_date'] == start.date()):
+                log = last
+                log['duration_hours'] += span
+            else:
+                log = {
+                    'log_date': start.date(),
+                    'duty_status': duty_status,
+                    'start_time': start.time(),
+                    'duration_hours': span,
+                    'location': self.sim.locate(self.mile),
+                    'remarks': remarks
+                }
+                self.logs.append(log)
+            self.clock += span
+
+            # Same day-boundary convention as ELDLog.fill_end_time
+            end = self.at(self.clock)
+            log['end_time'] = end.time() if end.date() == log['log_date'] else time(23, 59, 59)
+            self._last_log_end = self.clock
+            hours -= span
+        self.clock += max(hours, 0.0)
@@ -0,0 +1,107 @@
+# trips/instrumentation.py
+"""Timing of SQL, external providers, serialization and rendering per request or job.
+
+collect() puts a Timings collector in a context variable; code anywhere below it
+reports through timed() without being handed the collector, and timed() is a
+no-op when nothing is collecting.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('trips.perf')
+
+_current = contextvars.ContextVar('trips_timings', default=None)
+_active = contextvars.ContextVar('trips_timings_active', default=frozenset())
+
+class Timings:
+    """Total seconds and call count per metric name"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.metrics = {}
+        # Threads started with a copied context share the collector
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.metrics.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+        """{'total_ms': ..., '<name>_ms': ..., '<name>_count': ...}"""
+        data = {'total_ms': round(self.elapsed() * 1000, 2)}
+        for name, (seconds, count) in sorted(self.metrics.items()):
+            data[f'{name}_ms'] = round(seconds * 1000, 2)
+            data[f'{name}_count'] = count
+        return data
+
+    def server_timing(self) -> str:
+        """Server-Timing header value"""
+        entries = [
+            f'{name};dur={seconds * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+            for name, (seconds, count) in sorted(self.metrics.items())
+        ]
+        entries.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(entries)
+
+    def log(self, event: str, **fields):
+        """One structured log line with the timings and `fields`"""
+        logger.info(json.dumps({'event': event, **fields, **self.as_dict()}, default=str))
+
+def current_timings():
+    return _current.get()
+
+@contextmanager
+def timed(name: str):
+    """Add the time spent in the block to metric `name`; nested blocks of the same name count once"""
+    timings = _current.get()
+    active = _active.get()
+    if timings is None or name in active:
+        yield
+        return
+
+    token = _active.set(active | {name})
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+        _active.reset(token)
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+def instrument_connection(connection):
+    """Report the connection's queries as 'db' to whichever collector is current.
+    
+    Installed on every connection when it opens (see signals.py) rather than per collect():
+    sync_to_async and worker threads use their own connection objects.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+@contextmanager
+def collect():
+    """Collect timings for the block and anything it runs with a copy of its context"""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+class TimedRepresentationMixin:
+    """Serializer mixin that counts to_representation() time as 'serialize'"""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
@@ -0,0 +1,57 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from trips.benchmarks import BASELINE_VERSION, compare, run_suite
+
+class Command(BaseCommand):
+    help = "Run the planning/routing benchmark suite; save a JSON baseline or compare against one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--save', metavar='PATH', help="Write the results as a JSON baseline")
+        parser.add_argument('--compare', metavar='PATH', help="Baseline to compare against; exits non-zero on regressions")
+        parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown or memory growth (default 0.2 = 20%%)")
+        parser.add_argument('--repeat', type=int, default=20, help="Minimum timed runs per case")
+        parser.add_argument('--min-seconds', type=float, default=0.2, help="Minimum time spent timing each case")
+        parser.add_argument('--filter', dest='name_filter', help="Only run cases whose name contains this")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+            if baseline.get('version') != BASELINE_VERSION:
+                raise CommandError(f"Baseline format {baseline.get('version')} is not {BASELINE_VERSION}; save a new one")
+
+        self.stdout.write(f"{'case':<58} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'peak KiB':>10}")
+        report = run_suite(
+            repeat=options['repeat'],
+            min_seconds=options['min_seconds'],
+            name_filter=options['name_filter'],
+            progress=lambda name, r: self.stdout.write(
+                f"{name:<58} {r['p50_ms']:>9.3f} {r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_kib']:>10.1f}"
+            )
+        )
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Saved baseline to {options['save']}")
+
+        if baseline is None:
+            return
+
+        rows = compare(baseline, report, options['threshold'])
+        self.stdout.write(f"\n{'case':<58} {'base p50':>9} {'p50':>9} {'time':>7} {'memory':>7}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['name']:<58} {row['baseline_p50_ms']:>9.3f} {row['p50_ms']:>9.3f} "
+                f"{row['latency_ratio']:>6.2f}x {row['memory_ratio']:>6.2f}x"
+                + ("  REGRESSION" if row['regression'] else "")
+            )
+
+        regressions = [row['name'] for row in rows if row['regression']]
+        if regressions:
+            raise CommandError(f"{len(regressions)} case(s) regressed beyond {options['threshold']:.0%}")
+        self.stdout.write(f"No regressions beyond {options['threshold']:.0%} across {len(rows)} case(s)")
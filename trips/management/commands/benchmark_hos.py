@@ -0,0 +1,57 @@
+import random
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from trips.benchmarks import AVERAGE_SPEED_MPH, MILES_PER_DAY, synthetic_route
+from trips.geo import RouteIndex
+from trips.hos import HOSSimulator
+
+class Command(BaseCommand):
+    help = "Measure HOS simulator throughput (plans per second) for trips of 1 to 15 days"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=200, help="Plans simulated per trip length")
+        parser.add_argument('--max-days', type=int, default=15)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['plans'] < 1 or options['max_days'] < 1:
+            raise CommandError("--plans and --max-days must be positive")
+
+        rng = random.Random(options['seed'])
+        now = timezone.localtime()
+        total_plans, total_seconds = 0, 0.0
+
+        self.stdout.write(f"{'days':>4} {'plans/s':>10} {'ms/plan':>8} {'logs/plan':>9} {'stops/plan':>10}")
+        for days in range(1, options['max_days'] + 1):
+            miles = days * MILES_PER_DAY * 0.9
+            route_index = RouteIndex(synthetic_route(500, miles, seed=days), route_miles=miles)
+            simulator = HOSSimulator(route_index.locate)
+            trips = [
+                (
+                    now + timedelta(minutes=rng.randrange(0, 24 * 60, 15)),
+                    miles,
+                    miles / AVERAGE_SPEED_MPH,
+                    rng.uniform(0, 60),
+                    rng.uniform(0, miles / 4)
+                )
+                for _ in range(options['plans'])
+            ]
+
+            logs = stops = 0
+            started = time.perf_counter()
+            for departure, distance, drive_hours, cycle_hours, pickup_miles in trips:
+                plan = simulator.simulate(departure, distance, drive_hours, cycle_hours, pickup_miles)
+                logs += len(plan['eld_logs'])
+                stops += len(plan['rest_stops'])
+            elapsed = time.perf_counter() - started
+
+            total_plans += len(trips)
+            total_seconds += elapsed
+            self.stdout.write(
+                f"{days:>4} {len(trips) / elapsed:>10.0f} {elapsed / len(trips) * 1000:>8.3f} "
+                f"{logs / len(trips):>9.1f} {stops / len(trips):>10.1f}"
+            )
+
+        self.stdout.write(f" all {total_plans / total_seconds:>10.0f} {total_seconds / total_plans * 1000:>8.3f}")
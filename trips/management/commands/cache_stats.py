@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from trips.cache import CACHES, get_cache
+
+class Command(BaseCommand):
+    help = "Report hit/miss counts and size of the persistent lookup caches"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Caches to report (default: all)")
+        parser.add_argument('--clear', action='store_true', help="Empty the caches and reset their counters")
+    
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(CACHES)
+        if unknown:
+            raise CommandError(f"Unknown cache(s): {', '.join(sorted(unknown))}")
+        
+        for name in options['names'] or sorted(CACHES):
+            cache = get_cache(name)
+            if options['clear']:
+                cache.clear()
+                self.stdout.write(f"{name}: cleared")
+                continue
+            
+            stats = cache.stats()
+            self.stdout.write(
+                f"{name}: {stats['entries']}/{stats['max_entries']} entries, "
+                f"{stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_ratio']:.1%} hit ratio), ttl {stats['ttl_seconds']}s"
+            )
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from trips.breaker import get_breaker
+
+class Command(BaseCommand):
+    help = "Report the provider circuit breakers' state"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Providers to report (default: all)")
+        parser.add_argument('--reset', action='store_true', help="Close the breakers and clear their failure counts")
+    
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(settings.CIRCUIT_BREAKERS)
+        if unknown:
+            raise CommandError(f"Unknown provider(s): {', '.join(sorted(unknown))}")
+        
+        for name in options['names'] or sorted(settings.CIRCUIT_BREAKERS):
+            breaker = get_breaker(name)
+            if options['reset']:
+                breaker.reset()
+                self.stdout.write(f"{name}: reset")
+                continue
+            
+            status = breaker.status()
+            opened = f", opened {status['opened_at']:%Y-%m-%d %H:%M:%S}" if status['opened_at'] else ""
+            self.stdout.write(
+                f"{name}: {status['state']}, {status['failures']}/{status['failure_threshold']} failures{opened}; "
+                f"budget {status['latency_budget_seconds']}s, probe after {status['reset_timeout_seconds']}s"
+            )
@@ -0,0 +1,66 @@
+import re
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from trips.models import (
+    DailyDutyTotals, ELDLog, GeocodeCacheEntry, PlanningJob, RestStop, RouteCacheEntry, Trip
+)
+
+# "SCAN trips_eldlog" without "USING ... INDEX" reads the whole table
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)')
+
+def hot_queries():
+    """(label, queryset) for each query the API and workers run per request or job"""
+    today = date.today()
+    now = timezone.now()
+    key = '0' * 64
+    
+    return [
+        ("trip list (newest first)", Trip.objects.order_by('-created_at', '-id')[:50]),
+        ("trip list page after cursor", Trip.objects.filter(created_at__lt=now).order_by('-created_at', '-id')[:50]),
+        ("driver trips by status", Trip.objects.filter(driver_id=1, status='planned').order_by('-created_at')),
+        ("trip eld_logs", ELDLog.objects.filter(trip_id=1)),
+        ("trip rest_stops", RestStop.objects.filter(trip_id=1)),
+        ("driver logs over date range", ELDLog.objects.filter(driver_id=1, log_date__range=(today - timedelta(days=30), today))),
+        ("driver-day driving total", ELDLog.objects.filter(
+            driver_id=1, log_date=today, duty_status='driving'
+        ).values('driver_id').annotate(total=Sum('duration_hours')).order_by()),
+        ("daily totals lookup", DailyDutyTotals.objects.filter(driver_id=1, log_date=today)),
+        ("planning queue head", PlanningJob.objects.filter(status='queued').order_by('created_at', 'id')[:1]),
+        ("geocode cache lookup", GeocodeCacheEntry.objects.filter(key=key, created_at__gt=now)),
+        ("route cache lookup", RouteCacheEntry.objects.filter(key=key, created_at__gt=now)),
+        ("route cache expiry", RouteCacheEntry.objects.filter(created_at__lte=now)),
+        ("route cache LRU eviction", RouteCacheEntry.objects.order_by('last_used_at').values_list('id', flat=True)[:10]),
+    ]
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN QUERY PLAN for the hot ORM queries and flag full table scans"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if any query scans a table")
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write(f"Scan detection expects SQLite plans; got {connection.vendor}, printing plans only")
+        
+        scans = []
+        for label, queryset in hot_queries():
+            plan = queryset.explain()
+            self.stdout.write(f"== {label}")
+            self.stdout.write(plan)
+            
+            tables = FULL_SCAN.findall(plan) if connection.vendor == 'sqlite' else []
+            if tables:
+                scans.append(label)
+                self.stdout.write(self.style.WARNING(f"   full scan of {', '.join(tables)}"))
+            self.stdout.write("")
+        
+        if scans:
+            message = f"{len(scans)} quer{'y' if len(scans) == 1 else 'ies'} with full table scans: {', '.join(scans)}"
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full table scans"))
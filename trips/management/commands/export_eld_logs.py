@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from trips.exports import EXPORT_FORMATS, export_lines, export_rows
+
+class Command(BaseCommand):
+    help = "Write ELD logs as NDJSON or CSV, streaming rows so memory stays flat for any range"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--driver', type=int, action='append', dest='drivers', help="Only export this driver (repeatable)")
+        parser.add_argument('--start', help="First log date, YYYY-MM-DD")
+        parser.add_argument('--end', help="Last log date, YYYY-MM-DD")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', help="File to write (default: stdout)")
+    
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            if options[name]:
+                try:
+                    dates[name] = parse_date(options[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    raise CommandError(f"--{name} must be YYYY-MM-DD")
+        
+        rows = export_rows(options['drivers'], dates.get('start'), dates.get('end'))
+        lines = export_lines(options['format'], rows)
+        
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        
+        count = -1 if options['format'] == 'csv' else 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stderr.write(f"Wrote {count} log(s) to {options['output']}")
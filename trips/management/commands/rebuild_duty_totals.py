@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from trips.models import DailyDutyTotals, DriverCycleState
+
+class Command(BaseCommand):
+    help = "Recompute the per-driver daily duty totals and 8-day cycle states from ELD logs"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--driver', type=int, action='append', dest='drivers', help="Only rebuild this driver (repeatable)")
+    
+    def handle(self, *args, **options):
+        rows = DailyDutyTotals.rebuild(driver_ids=options['drivers'])
+        self.stdout.write(f"Rebuilt {rows} driver-day total(s)")
+        
+        states = DriverCycleState.rebuild(driver_ids=options['drivers'])
+        self.stdout.write(f"Rebuilt {len(states)} cycle state(s)")
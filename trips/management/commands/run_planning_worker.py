@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from trips.services import TripPlanningService
+
+class Command(BaseCommand):
+    help = "Process queued trip planning jobs (routing and ELD compliance plans)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit instead of polling")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--max-attempts', type=int, default=3, help="Attempts before a job is marked failed")
+        parser.add_argument('--lease', type=int, default=60,
+                            help="Seconds a job stays claimed without a heartbeat before it is requeued")
+    
+    def handle(self, *args, **options):
+        planner = TripPlanningService()
+        lease = timedelta(seconds=options['lease'])
+        
+        self.stdout.write("Planning worker started")
+        while True:
+            requeued, failed = planner.requeue_stale_jobs(options['max_attempts'], lease)
+            if requeued or failed:
+                self.stdout.write(f"Requeued {requeued} and failed {failed} job(s) with expired leases")
+            
+            job = planner.claim_next_job(lease)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            
+            started = time.monotonic()
+            job = planner.run_job(job, max_attempts=options['max_attempts'], lease=lease)
+            self.stdout.write(
+                f"Job {job.id} (trip {job.trip_id}): {job.status} in {time.monotonic() - started:.2f}s"
+            )
@@ -0,0 +1,123 @@
+# Writers run in spawned processes that import this module before Django is set up,
+# so models are only imported inside functions
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+STOPS = ({'lat': 40.7, 'lng': -74.0}, {'lat': 41.8, 'lng': -87.6}, {'lat': 34.05, 'lng': -118.2})
+
+def _use_database(name, options):
+    connections['default'].close()
+    connections['default'].settings_dict.update(NAME=name, OPTIONS=options)
+
+def _writer(name, options, driver_ids, route_data, barrier, results):
+    """One writer process: plan and store a trip for each driver, as the planning worker does"""
+    import django
+    django.setup()
+    from django.core.exceptions import ValidationError
+    from django.db import OperationalError
+    from trips.models import Trip
+    from trips.services import TripPlanningService
+
+    _use_database(name, options)
+    planner = TripPlanningService()
+    latencies, locked, failed = [], 0, 0
+    barrier.wait()
+    for driver_id in driver_ids:
+        trip = Trip(
+            driver_id=driver_id,
+            current_location=STOPS[0],
+            pickup_location=STOPS[1],
+            dropoff_location=STOPS[2],
+            current_cycle_used_hours=0
+        )
+        started = time.perf_counter()
+        try:
+            planner.plan_trip(trip, route_data)
+        except OperationalError:
+            locked += 1
+        except ValidationError:
+            failed += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+    results.put((latencies, locked, failed))
+
+class Command(BaseCommand):
+    help = "Plan trips from N concurrent writer processes against a scratch SQLite database and report throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="Writer process counts to run")
+        parser.add_argument('--trips', type=int, default=25, help="Trips each writer plans")
+        parser.add_argument('--profile', choices=sorted(settings.SQLITE_PROFILES), default=settings.SQLITE_PROFILE,
+                            help="SQLite connection profile (default: the configured one)")
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("The default database is not SQLite")
+
+        from django.contrib.auth.models import User
+        from trips.benchmarks import percentile
+        from trips.models import Driver
+        from trips.services import RouteCalculatorService
+
+        sqlite_options = settings.SQLITE_PROFILES[options['profile']]
+        directory = tempfile.mkdtemp(prefix='stress_sqlite_')
+        original = dict(connections['default'].settings_dict)
+        try:
+            name = os.path.join(directory, 'stress.sqlite3')
+            _use_database(name, sqlite_options)
+            call_command('migrate', verbosity=0)
+
+            # A fresh driver per trip in every round, so the HOS daily limits never reject a plan
+            total = sum(options['workers']) * options['trips']
+            users = User.objects.bulk_create([User(username=f'stress{i}') for i in range(total)])
+            drivers = Driver.objects.bulk_create([Driver(user=user, license_number=f'S{user.id}') for user in users])
+            driver_ids = [driver.id for driver in drivers]
+            # 2,600 miles: about 30 logs and stops per trip, written in one transaction
+            route_data = RouteCalculatorService()._calculate_straight_line_route(*STOPS)
+            connections['default'].close()
+
+            self.stdout.write(f"profile={options['profile']}, {options['trips']} trips per writer, scratch db {name}")
+            self.stdout.write(f"{'writers':>7} {'trips':>6} {'trips/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'locked':>7} {'failed':>7}")
+            context = multiprocessing.get_context('spawn')
+            offset = 0
+            for workers in options['workers']:
+                barrier = context.Barrier(workers + 1)
+                results = context.Queue()
+                processes = []
+                for _ in range(workers):
+                    batch = driver_ids[offset:offset + options['trips']]
+                    offset += options['trips']
+                    processes.append(context.Process(
+                        target=_writer,
+                        args=(name, sqlite_options, batch, route_data, barrier, results)
+                    ))
+                for process in processes:
+                    process.start()
+                barrier.wait(timeout=120)  # raises if a writer died during startup
+                started = time.perf_counter()
+                outcomes = [results.get() for _ in processes]
+                elapsed = time.perf_counter() - started
+                for process in processes:
+                    process.join()
+
+                latencies = sorted(latency for outcome in outcomes for latency in outcome[0])
+                locked = sum(outcome[1] for outcome in outcomes)
+                failed = sum(outcome[2] for outcome in outcomes)
+                p50 = percentile(latencies, 0.50) * 1000 if latencies else 0.0
+                p99 = percentile(latencies, 0.99) * 1000 if latencies else 0.0
+                self.stdout.write(
+                    f"{workers:>7} {len(latencies):>6} {len(latencies) / elapsed:>8.1f} "
+                    f"{p50:>8.1f} {p99:>8.1f} {locked:>7} {failed:>7}"
+                )
+        finally:
+            connections['default'].close()
+            connections['default'].settings_dict.clear()
+            connections['default'].settings_dict.update(original)
+            shutil.rmtree(directory, ignore_errors=True)
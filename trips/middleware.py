@@ -0,0 +1,53 @@
+# trips/middleware.py
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .instrumentation import collect, current_timings
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header (SQL, providers, serialization, rendering, total) and logs
+    the same numbers as one structured line per request"""
+
+    sync_capable = True
+    async_capable = True  # a sync-only middleware would push async views back onto threads
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.SERVER_TIMING:
+            return self.get_response(request)
+
+        with collect() as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not settings.SERVER_TIMING:
+            return await self.get_response(request)
+
+        with collect() as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        response['Server-Timing'] = timings.server_timing()
+        timings.log(
+            'request',
+            method=request.method,
+            path=request.path,
+            status=response.status_code
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that step as well
+        timings = current_timings()
+        if timings is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timings.add('render', time.perf_counter() - started))
+        return response
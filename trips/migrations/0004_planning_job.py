@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_route_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='planning_job', to='trips.trip')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:12
+
+import trips.fields
+from django.db import migrations
+
+
+def pack_route_coordinates(apps, schema_editor):
+    Trip = apps.get_model('trips', 'Trip')
+    trips = Trip.objects.filter(route_coordinates__isnull=False).only('id', 'route_coordinates')
+    for trip in trips.iterator(chunk_size=200):
+        trip.route_geometry = trip.route_coordinates
+        trip.save(update_fields=['route_geometry'])
+
+
+def unpack_route_coordinates(apps, schema_editor):
+    Trip = apps.get_model('trips', 'Trip')
+    trips = Trip.objects.filter(route_geometry__isnull=False).only('id', 'route_geometry')
+    for trip in trips.iterator(chunk_size=200):
+        trip.route_coordinates = trip.route_geometry
+        trip.save(update_fields=['route_coordinates'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_planning_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='route_geometry',
+            field=trips.fields.PackedCoordinatesField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_route_coordinates, unpack_route_coordinates),
+        migrations.RemoveField(
+            model_name='trip',
+            name='route_coordinates',
+        ),
+        migrations.RenameField(
+            model_name='trip',
+            old_name='route_geometry',
+            new_name='route_coordinates',
+        ),
+    ]
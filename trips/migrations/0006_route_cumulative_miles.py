@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:08
+
+import trips.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_pack_route_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='route_cumulative_miles',
+            field=trips.fields.PackedDistancesField(blank=True, null=True),
+        ),
+    ]
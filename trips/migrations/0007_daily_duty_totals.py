@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+STATUS_FIELDS = {
+    'driving': 'driving_hours',
+    'on_duty': 'on_duty_hours',
+    'off_duty': 'off_duty_hours',
+    'sleeper': 'sleeper_hours',
+}
+
+
+def backfill_daily_totals(apps, schema_editor):
+    ELDLog = apps.get_model('trips', 'ELDLog')
+    DailyDutyTotals = apps.get_model('trips', 'DailyDutyTotals')
+
+    rows = {}
+    sums = ELDLog.objects.values_list('driver_id', 'log_date', 'duty_status').annotate(
+        total=Sum('duration_hours')
+    ).order_by()
+    for driver_id, log_date, duty_status, total in sums:
+        row = rows.setdefault((driver_id, log_date), DailyDutyTotals(driver_id=driver_id, log_date=log_date))
+        setattr(row, STATUS_FIELDS[duty_status], total)
+    DailyDutyTotals.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0006_route_cumulative_miles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDutyTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_date', models.DateField()),
+                ('driving_hours', models.FloatField(default=0.0)),
+                ('on_duty_hours', models.FloatField(default=0.0)),
+                ('off_duty_hours', models.FloatField(default=0.0)),
+                ('sleeper_hours', models.FloatField(default=0.0)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='trips.driver')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('driver', 'log_date'), name='unique_daily_totals_per_driver_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_totals, migrations.RunPython.noop),
+    ]
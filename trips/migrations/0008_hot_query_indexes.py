@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_daily_duty_totals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailydutytotals',
+            name='driver',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='trips.driver'),
+        ),
+        migrations.AlterField(
+            model_name='eldlog',
+            name='driver',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='trips.driver'),
+        ),
+        migrations.AlterField(
+            model_name='eldlog',
+            name='trip',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='eld_logs', to='trips.trip'),
+        ),
+        migrations.AlterField(
+            model_name='planningjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='reststop',
+            name='trip',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rest_stops', to='trips.trip'),
+        ),
+        migrations.AlterField(
+            model_name='trip',
+            name='driver',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='trips', to='trips.driver'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['trip', 'log_date', 'start_time'], name='eldlog_trip_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['driver', 'log_date', 'start_time'], name='eldlog_driver_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eldlog',
+            index=models.Index(fields=['driver', 'log_date', 'duty_status', 'duration_hours'], name='eldlog_driver_day_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='geocodecacheentry',
+            index=models.Index(fields=['created_at'], name='geocodecacheentry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planningjob',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='planningjob_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reststop',
+            index=models.Index(fields=['trip', 'distance_from_start_miles'], name='reststop_trip_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routecacheentry',
+            index=models.Index(fields=['created_at'], name='routecacheentry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['driver', 'status', 'created_at'], name='trip_driver_status_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_total_days(apps, schema_editor):
+    Trip = apps.get_model('trips', 'Trip')
+    planned = Trip.objects.annotate(days=Count('eld_logs__log_date', distinct=True)).filter(days__gt=0)
+    trips = [Trip(id=trip_id, total_days=days) for trip_id, days in planned.values_list('id', 'days')]
+    Trip.objects.bulk_update(trips, ['total_days'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='total_days',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_total_days, migrations.RunPython.noop),
+    ]
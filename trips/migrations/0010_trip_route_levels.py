@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:12
+
+import django.db.models.deletion
+import trips.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0009_trip_total_days'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripRouteLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('tolerance_miles', models.FloatField()),
+                ('point_count', models.PositiveIntegerField()),
+                ('coordinates', trips.fields.PackedCoordinatesField()),
+                ('trip', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='route_levels', to='trips.trip')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('trip', 'level'), name='unique_route_level_per_trip')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0010_trip_route_levels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverCycleState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_end', models.DateField(blank=True, null=True)),
+                ('daily_hours', models.JSONField(default=list)),
+                ('cycle_hours', models.FloatField(default=0.0)),
+                ('last_on_duty_end', models.DateTimeField(blank=True, null=True)),
+                ('last_restart_at', models.DateTimeField(blank=True, null=True)),
+                ('stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_state', to='trips.driver')),
+            ],
+        ),
+    ]
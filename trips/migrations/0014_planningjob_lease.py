@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0013_provider_circuit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planningjob',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:15
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def move_planned_departures(apps, schema_editor):
+    # Trips not started yet can only have trip_start_time from creation, where it meant the planned departure
+    Trip = apps.get_model('trips', 'Trip')
+    Trip.objects.filter(status='planned', trip_start_time__isnull=False).update(
+        planned_departure=F('trip_start_time'), trip_start_time=None
+    )
+
+
+def restore_planned_departures(apps, schema_editor):
+    Trip = apps.get_model('trips', 'Trip')
+    Trip.objects.filter(status='planned', planned_departure__isnull=False).update(
+        trip_start_time=F('planned_departure')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0014_planningjob_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='planned_departure',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_planned_departures, restore_planned_departures),
+    ]
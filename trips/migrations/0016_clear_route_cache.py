@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+def clear_route_cache(apps, schema_editor):
+    # Entries cached from ORS before the response was read from its summary hold the
+    # first leg's distance and a duration in seconds; they are recalculated on next use
+    apps.get_model('trips', 'RouteCacheEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0015_trip_planned_departure'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_route_cache, migrations.RunPython.noop),
+    ]
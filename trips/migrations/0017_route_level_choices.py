@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:41
+
+import trips.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0016_clear_route_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='triproutelevel',
+            name='level',
+            field=models.CharField(choices=trips.models.route_level_choices, max_length=10),
+        ),
+    ]
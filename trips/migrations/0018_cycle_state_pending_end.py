@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+def mark_states_stale(apps, schema_editor):
+    # Existing states don't know their pending planned logs; the next read rebuilds them
+    apps.get_model('trips', 'DriverCycleState').objects.update(stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0017_route_level_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drivercyclestate',
+            name='pending_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_states_stale, migrations.RunPython.noop),
+    ]
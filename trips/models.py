@@ -1,8 +1,16 @@
 # trips/models.py
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.utils import timezone
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta, time
 import json
+from copy import copy
+from .fields import PackedCoordinatesField, PackedDistancesField
+
+# Sent with trip_ids after Trip.save() or Trip.bump_versions() changed trip versions
+trip_changed = Signal()
 
 class Driver(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -12,6 +20,12 @@ class Driver(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.license_number}"
 
+class TripQuerySet(models.QuerySet):
+    def delete(self):
+        with transaction.atomic():
+            ELDLog.forget_totals(ELDLog.objects.filter(trip__in=self))
+            return super().delete()
+
 class Trip(models.Model):
     STATUS_CHOICES = [
         ('planned', 'Planned'),
@@ -20,7 +34,7 @@ class Trip(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
-    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='trips')
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='trips', db_index=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
     
     current_location = models.JSONField()
@@ -30,17 +44,65 @@ class Trip(models.Model):
     total_distance_miles = models.FloatField(null=True, blank=True)
     estimated_drive_time_hours = models.FloatField(null=True, blank=True)
     current_cycle_used_hours = models.FloatField()
+    total_days = models.PositiveSmallIntegerField(null=True, blank=True)  # set by the compliance plan
     
-    route_coordinates = models.JSONField(null=True, blank=True)
+    route_coordinates = PackedCoordinatesField(null=True, blank=True)  # [[lat, lng], ...]
+    route_cumulative_miles = PackedDistancesField(null=True, blank=True)  # per route point
     waypoints = models.JSONField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
-    trip_start_time = models.DateTimeField(null=True, blank=True)
+    planned_departure = models.DateTimeField(null=True, blank=True)  # requested at creation; the plan starts here
+    trip_start_time = models.DateTimeField(null=True, blank=True)  # when the driver actually started
     trip_end_time = models.DateTimeField(null=True, blank=True)
+    # Bumped on every change to the trip, its rest stops, logs or route levels; the ETag source
+    version = models.PositiveIntegerField(default=1)
+    
+    objects = TripQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Newest-first listing and its cursor
+            models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+            # Per-driver listing filtered on status; also serves driver FK lookups
+            models.Index(fields=['driver', 'status', 'created_at'], name='trip_driver_status_idx'),
+        ]
     
     def __str__(self):
         return f"Trip {self.id} - {self.driver.user.get_full_name()}"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        
+        # Incremented in SQL so concurrent bumps from related rows aren't overwritten
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+        trip_changed.send(sender=Trip, trip_ids={self.pk})
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ELDLog.forget_totals(ELDLog.objects.filter(trip=self))
+            return super().delete(*args, **kwargs)
+    
+    @classmethod
+    def bump_versions(cls, trip_ids):
+        """Mark trips changed after writes that don't go through Trip.save()"""
+        trip_ids = {trip_id for trip_id in trip_ids if trip_id is not None}
+        if trip_ids:
+            cls.objects.filter(pk__in=trip_ids).update(version=models.F('version') + 1)
+            trip_changed.send(sender=cls, trip_ids=trip_ids)
+    
+    def etag(self, variant: str = '') -> str:
+        return self.etag_for(self.pk, self.version, variant)
+    
+    @staticmethod
+    def etag_for(trip_id, version, variant: str = '') -> str:
+        """Strong ETag of one representation (`variant`) of a trip at `version`"""
+        return f'"trip-{trip_id}-v{version}{"-" + variant if variant else ""}"'
+    
     @property
     def requires_multiple_days(self):
         if not self.estimated_drive_time_hours:
@@ -53,7 +115,51 @@ class Trip(models.Model):
         
         return self.estimated_drive_time_hours > available_drive_hours
 
-class ELDLog(models.Model):
+# Deletes of a trip's stops, logs and route levels bump its version here rather than in
+# post_delete receivers: a receiver would stop Django from fast-deleting them in a cascade
+
+class TripChildQuerySet(models.QuerySet):
+    def delete(self):
+        with transaction.atomic():
+            Trip.bump_versions(self.order_by().values_list('trip_id', flat=True).distinct())
+            return super().delete()
+
+class TripChildMixin:
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            Trip.bump_versions([self.trip_id])
+            return super().delete(*args, **kwargs)
+
+def route_level_choices():
+    # Callable, so the levels come from settings.ROUTE_DETAIL_LEVELS rather than the migrations
+    return [(level, level.title()) for level in settings.ROUTE_DETAIL_LEVELS]
+
+class TripRouteLevel(TripChildMixin, models.Model):
+    """A Douglas-Peucker simplification of the trip's route for one map detail level"""
+    
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='route_levels', db_index=False)
+    level = models.CharField(max_length=10, choices=route_level_choices)
+    tolerance_miles = models.FloatField()
+    point_count = models.PositiveIntegerField()
+    coordinates = PackedCoordinatesField()
+    
+    objects = TripChildQuerySet.as_manager()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trip', 'level'], name='unique_route_level_per_trip'),
+        ]
+    
+    def __str__(self):
+        return f"Trip {self.trip_id} route ({self.level}, {self.point_count} points)"
+
+class ELDLogQuerySet(TripChildQuerySet):
+    def delete(self):
+        with transaction.atomic():
+            ELDLog.forget_totals(self)
+            return super().delete()
+
+class ELDLog(TripChildMixin, models.Model):
     DUTY_STATUS_CHOICES = [
         ('off_duty', 'Off Duty'),
         ('sleeper', 'Sleeper Berth'),
@@ -61,8 +167,8 @@ class ELDLog(models.Model):
         ('on_duty', 'On Duty (Not Driving)'),
     ]
     
-    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='eld_logs', null=True, blank=True)
-    driver = models.ForeignKey(Driver, on_delete=models.CASCADE)
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='eld_logs', null=True, blank=True, db_index=False)
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, db_index=False)
     
     log_date = models.DateField()
     duty_status = models.CharField(max_length=20, choices=DUTY_STATUS_CHOICES)
@@ -77,9 +183,19 @@ class ELDLog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ELDLogQuerySet.as_manager()
+    
     class Meta:
         ordering = ['log_date', 'start_time']
         # unique_together = [['driver', 'log_date', 'start_time']]
+        indexes = [
+            # trip.eld_logs in display order
+            models.Index(fields=['trip', 'log_date', 'start_time'], name='eldlog_trip_order_idx'),
+            # A driver's logs over a date range in display order
+            models.Index(fields=['driver', 'log_date', 'start_time'], name='eldlog_driver_order_idx'),
+            # Per driver-day status sums; duration_hours makes it covering
+            models.Index(fields=['driver', 'log_date', 'duty_status', 'duration_hours'], name='eldlog_driver_day_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.log_date} - {self.duty_status} ({self.duration_hours}h)"
@@ -91,13 +207,12 @@ class ELDLog(models.Model):
             raise ValidationError('Duration must be positive')
         
         if self.duty_status == 'driving':
-            daily_driving = ELDLog.objects.filter(
-                driver=self.driver,
-                log_date=self.log_date,
-                duty_status='driving'
-            ).exclude(pk=self.pk).aggregate(
-                total=models.Sum('duration_hours')
-            )['total'] or 0
+            daily_driving = DailyDutyTotals.for_day(self.driver_id, self.log_date).driving_hours
+            
+            # The totals already include this log's stored version, if any
+            saved = self._saved_state()
+            if saved and saved == (self.driver_id, self.log_date, 'driving', saved[3]):
+                daily_driving -= saved[3]
             
             if daily_driving + self.duration_hours > 11:
                 raise ValidationError('Daily driving limit of 11 hours exceeded')
@@ -113,7 +228,7 @@ class ELDLog(models.Model):
         #     if overlapping.exists():
         #         raise ValidationError('Log entry overlaps with existing log')
     
-    def save(self, *args, **kwargs):
+    def fill_end_time(self):
         if not self.end_time and self.duration_hours:
             start_datetime = datetime.combine(self.log_date, self.start_time)
             end_datetime = start_datetime + timedelta(hours=self.duration_hours)
@@ -122,34 +237,447 @@ class ELDLog(models.Model):
                 self.end_time = time(23, 59, 59)  # End at day boundary
             else:
                 self.end_time = end_datetime.time()
+    
+    def _saved_state(self):
+        """(driver_id, log_date, duty_status, duration_hours) as stored, or None for a new log"""
+        if not hasattr(self, '_saved_state_cache'):
+            self._saved_state_cache = None
+            if self.pk is not None:
+                self._saved_state_cache = ELDLog.objects.filter(pk=self.pk).values_list(
+                    'driver_id', 'log_date', 'duty_status', 'duration_hours'
+                ).first()
+        return self._saved_state_cache
+    
+    def save(self, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                self.fill_end_time()
+                self.clean()
+                saved = self._saved_state()
+                super().save(*args, **kwargs)
+                
+                deltas = DailyDutyTotals.deltas_for([self])
+                if saved:
+                    driver_id, log_date, duty_status, duration_hours = saved
+                    DailyDutyTotals.add_delta(deltas, driver_id, log_date, duty_status, -duration_hours)
+                DailyDutyTotals.apply(deltas)
+                
+                if saved:
+                    DriverCycleState.mark_stale({self.driver_id, saved[0]})
+                else:
+                    DriverCycleState.record([self])
+        finally:
+            self.__dict__.pop('_saved_state_cache', None)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ELDLog.forget_totals(ELDLog.objects.filter(pk=self.pk))
+            return super().delete(*args, **kwargs)
+    
+    @classmethod
+    def forget_totals(cls, logs):
+        """Take `logs`, about to be deleted, out of the daily totals with one aggregate query
         
-        self.clean()
-        super().save(*args, **kwargs)
+        Deletes that cascade from a Driver need nothing: its totals and cycle state go with it.
+        """
+        deltas, driver_ids = {}, set()
+        sums = logs.order_by().values_list('driver_id', 'log_date', 'duty_status').annotate(
+            total=models.Sum('duration_hours')
+        )
+        for driver_id, log_date, duty_status, total in sums:
+            DailyDutyTotals.add_delta(deltas, driver_id, log_date, duty_status, -total)
+            driver_ids.add(driver_id)
+        DailyDutyTotals.apply(deltas, create_missing=False)
+        DriverCycleState.mark_stale(driver_ids)
+    
+    @classmethod
+    def validate_batch(cls, logs, daily_driving=None):
+        """Run clean() rules over unsaved logs in memory, with one query for existing totals
+        
+        Pass `daily_driving` ({(driver_id, log_date): hours}, see DailyDutyTotals.driving_hours_for)
+        to validate several batches against one lookup; it is updated in place when the
+        batch passes.
+        """
+        from django.core.exceptions import ValidationError
+        
+        batch_driving = {}
+        for log in logs:
+            log.fill_end_time()
+            if log.duration_hours <= 0:
+                raise ValidationError('Duration must be positive')
+            if log.duty_status == 'driving':
+                key = (log.driver_id, log.log_date)
+                batch_driving[key] = batch_driving.get(key, 0) + log.duration_hours
+        
+        if not batch_driving:
+            return
+        
+        if daily_driving is None:
+            daily_driving = DailyDutyTotals.driving_hours_for(batch_driving)
+        for key, hours in batch_driving.items():
+            if daily_driving.get(key, 0) + hours > 11:
+                raise ValidationError('Daily driving limit of 11 hours exceeded')
+        
+        for key, hours in batch_driving.items():
+            daily_driving[key] = daily_driving.get(key, 0) + hours
     
     @property
     def is_violation(self):
         """Check if this log creates any HOS violations"""
+        totals = DailyDutyTotals.for_day(self.driver_id, self.log_date)
+        
         # Check driving limits
-        if self.duty_status == 'driving':
-            daily_driving = ELDLog.objects.filter(
-                driver=self.driver,
-                log_date=self.log_date,
-                duty_status='driving'
-            ).aggregate(total=models.Sum('duration_hours'))['total'] or 0
-            
-            if daily_driving > 11:
-                return True
+        if self.duty_status == 'driving' and totals.driving_hours > 11:
+            return True
         
         # Check on-duty limits
-        daily_on_duty = ELDLog.objects.filter(
-            driver=self.driver,
-            log_date=self.log_date,
-            duty_status__in=['driving', 'on_duty']
-        ).aggregate(total=models.Sum('duration_hours'))['total'] or 0
+        return totals.driving_hours + totals.on_duty_hours > 14
+
+class DailyDutyTotals(models.Model):
+    """Hours per duty status for one driver-day, kept in step with ELDLog writes"""
+    
+    STATUS_FIELDS = {
+        'driving': 'driving_hours',
+        'on_duty': 'on_duty_hours',
+        'off_duty': 'off_duty_hours',
+        'sleeper': 'sleeper_hours',
+    }
+    
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='daily_totals', db_index=False)
+    log_date = models.DateField()
+    
+    driving_hours = models.FloatField(default=0.0)
+    on_duty_hours = models.FloatField(default=0.0)  # on duty, not driving
+    off_duty_hours = models.FloatField(default=0.0)
+    sleeper_hours = models.FloatField(default=0.0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['driver', 'log_date'], name='unique_daily_totals_per_driver_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.driver_id} {self.log_date}: {self.driving_hours}h driving, {self.on_duty_hours}h on duty"
+    
+    @classmethod
+    def for_day(cls, driver_id, log_date) -> 'DailyDutyTotals':
+        """Stored totals, or an unsaved all-zero row when the driver has no logs that day"""
+        totals = cls.objects.filter(driver_id=driver_id, log_date=log_date).first()
+        return totals or cls(driver_id=driver_id, log_date=log_date)
+    
+    @classmethod
+    def driving_hours_for(cls, keys) -> dict:
+        """{(driver_id, log_date): stored driving hours} for the given driver-days, in one query"""
+        existing = cls.objects.filter(
+            driver_id__in={driver_id for driver_id, _ in keys},
+            log_date__in={log_date for _, log_date in keys}
+        ).values_list('driver_id', 'log_date', 'driving_hours')
+        return {(driver_id, log_date): hours for driver_id, log_date, hours in existing}
+    
+    @classmethod
+    def add_delta(cls, deltas, driver_id, log_date, duty_status, hours):
+        day = deltas.setdefault((driver_id, log_date), {})
+        field = cls.STATUS_FIELDS[duty_status]
+        day[field] = day.get(field, 0) + hours
+    
+    @classmethod
+    def deltas_for(cls, logs, sign=1):
+        """{(driver_id, log_date): {field: hours}} contributed by `logs`"""
+        deltas = {}
+        for log in logs:
+            cls.add_delta(deltas, log.driver_id, log.log_date, log.duty_status, sign * log.duration_hours)
+        return deltas
+    
+    @classmethod
+    def apply(cls, deltas, create_missing=True):
+        """Add `deltas` to the stored rows; one read and at most two writes whatever the day count"""
+        if not deltas:
+            return
+        
+        with transaction.atomic():
+            rows = {
+                (row.driver_id, row.log_date): row
+                for row in cls.objects.select_for_update().filter(
+                    driver_id__in={driver_id for driver_id, _ in deltas},
+                    log_date__in={log_date for _, log_date in deltas}
+                )
+            }
+            
+            changed, created = [], []
+            for key, fields in deltas.items():
+                row = rows.get(key)
+                if row is None:
+                    if not create_missing:
+                        continue
+                    row = cls(driver_id=key[0], log_date=key[1])
+                    created.append(row)
+                else:
+                    changed.append(row)
+                for field, hours in fields.items():
+                    setattr(row, field, getattr(row, field) + hours)
+            
+            if changed:
+                cls.objects.bulk_update(changed, list(cls.STATUS_FIELDS.values()))
+            if created:
+                cls.objects.bulk_create(created)
+    
+    @classmethod
+    def rebuild(cls, driver_ids=None) -> int:
+        """Recompute the table from ELDLog; returns the number of rows written"""
+        logs = ELDLog.objects.all()
+        totals = cls.objects.all()
+        if driver_ids is not None:
+            logs = logs.filter(driver_id__in=driver_ids)
+            totals = totals.filter(driver_id__in=driver_ids)
+        
+        rows = {}
+        sums = logs.values_list('driver_id', 'log_date', 'duty_status').annotate(
+            total=models.Sum('duration_hours')
+        ).order_by()
+        for driver_id, log_date, duty_status, total in sums:
+            row = rows.setdefault((driver_id, log_date), cls(driver_id=driver_id, log_date=log_date))
+            setattr(row, cls.STATUS_FIELDS[duty_status], total)
+        
+        with transaction.atomic():
+            totals.delete()
+            cls.objects.bulk_create(rows.values(), batch_size=500)
+        return len(rows)
+
+class DriverCycleState(models.Model):
+    """Rolling 70-hour/8-day on-duty total for a driver, advanced as logs are written
+    
+    `daily_hours` holds on-duty hours (driving included) for the CYCLE_DAYS days ending at
+    `window_end`, oldest first. A gap of RESTART_HOURS or more between on-duty periods is a
+    34-hour restart: hours logged before it stop counting. Only logs that have ended count:
+    planned ones are skipped when saved and folded in by catch_up() on the first read after
+    `pending_end`, when the earliest of them ends; other reads cost one query.
+    Logs that arrive out of order, edits and deletes mark the state stale and it is rebuilt
+    from the window's logs on the next read.
+    """
+    
+    CYCLE_DAYS = 8
+    MAX_CYCLE_HOURS = 70
+    RESTART_HOURS = 34
+    ON_DUTY_STATUSES = ('driving', 'on_duty')
+    
+    driver = models.OneToOneField(Driver, on_delete=models.CASCADE, related_name='cycle_state')
+    window_end = models.DateField(null=True, blank=True)  # null until the driver logs on-duty time
+    daily_hours = models.JSONField(default=list)
+    cycle_hours = models.FloatField(default=0.0)  # sum of daily_hours
+    last_on_duty_end = models.DateTimeField(null=True, blank=True)
+    last_restart_at = models.DateTimeField(null=True, blank=True)
+    # End of the earliest on-duty log not counted yet because it hadn't happened
+    pending_end = models.DateTimeField(null=True, blank=True)
+    stale = models.BooleanField(default=False)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.driver_id}: {self.cycle_hours}h in the {self.CYCLE_DAYS} days to {self.window_end}"
+    
+    @classmethod
+    def for_driver(cls, driver_id) -> 'DriverCycleState':
+        """The driver's state as of now: rebuilt if it is missing or stale, caught up if a planned log has ended"""
+        state = cls.objects.filter(driver_id=driver_id).first()
+        if state is None or state.stale:
+            return cls.rebuild([driver_id])[driver_id]
+        if state.pending_end is not None and state.pending_end <= timezone.now():
+            state.catch_up()
+        return state
+    
+    def catch_up(self):
+        """Fold in on-duty logs that have ended since they were saved, typically planned ones"""
+        self._fold(timezone.now())
+        self.save(update_fields=[
+            'window_end', 'daily_hours', 'cycle_hours', 'last_on_duty_end', 'last_restart_at', 'pending_end',
+            'updated_at'
+        ])
+    
+    def as_of(self, moment: datetime) -> 'DriverCycleState':
+        """This state with the planned logs that end by `moment` folded in; an unsaved copy when there are any"""
+        if self.pending_end is None or self.pending_end > moment:
+            return self
+        state = copy(self)
+        state.daily_hours = list(self.daily_hours)
+        state._fold(moment)
+        return state
+    
+    def _fold(self, moment: datetime):
+        """Advance through the uncounted on-duty logs that end by `moment`; pending_end becomes the next one's end"""
+        logs = ELDLog.objects.filter(driver_id=self.driver_id, duty_status__in=self.ON_DUTY_STATUSES)
+        if self.last_on_duty_end:
+            logs = logs.filter(log_date__gte=timezone.localdate(self.last_on_duty_end))
+        
+        self.pending_end = None
+        for log_date, start_time, hours in logs.order_by('log_date', 'start_time').values_list(
+            'log_date', 'start_time', 'duration_hours'
+        ):
+            start, end = self._log_span(log_date, start_time, hours)
+            if self.last_on_duty_end and start < self.last_on_duty_end:
+                continue  # counted already
+            if end > moment:
+                self.pending_end = end
+                break
+            self._advance(log_date, start, end, hours)
+    
+    def hours_at(self, moment: datetime) -> float:
+        """On-duty hours counting toward the cycle at `moment`"""
+        if self.window_end is None:
+            return 0.0
+        if self.last_on_duty_end and moment - self.last_on_duty_end >= timedelta(hours=self.RESTART_HOURS):
+            return 0.0
+        
+        # Days that have slid out of the window since window_end no longer count
+        expired = (moment.date() - self.window_end).days
+        if expired <= 0:
+            return self.cycle_hours
+        return float(sum(self.daily_hours[expired:]))
+    
+    def available_hours(self, moment: datetime) -> float:
+        return max(0.0, self.MAX_CYCLE_HOURS - self.hours_at(moment))
+    
+    @staticmethod
+    def _log_span(log_date, start_time, duration_hours):
+        start = timezone.make_aware(datetime.combine(log_date, start_time))
+        return start, start + timedelta(hours=duration_hours)
+    
+    def _advance(self, log_date, start, end, hours) -> bool:
+        """Fold one on-duty period into the window; False if it predates what is already counted"""
+        if self.last_on_duty_end and start < self.last_on_duty_end:
+            return False
+        
+        if not self.daily_hours:
+            self.daily_hours = [0.0] * self.CYCLE_DAYS
+        if self.last_on_duty_end and start - self.last_on_duty_end >= timedelta(hours=self.RESTART_HOURS):
+            self.daily_hours = [0.0] * self.CYCLE_DAYS
+            self.last_restart_at = start
+        
+        if self.window_end is None:
+            self.window_end = log_date
+        shift = (log_date - self.window_end).days
+        if shift > 0:
+            self.daily_hours = (self.daily_hours + [0.0] * shift)[-self.CYCLE_DAYS:]
+            self.window_end = log_date
+        
+        # Offset 0 is window_end, the last slot; older days count back from it
+        offset = (log_date - self.window_end).days
+        if offset > -self.CYCLE_DAYS:
+            self.daily_hours[offset - 1] += hours
+        self.cycle_hours = float(sum(self.daily_hours))
+        self.last_on_duty_end = end
+        return True
+    
+    @classmethod
+    def record(cls, logs):
+        """Advance the states of the logs' drivers by newly saved logs that have already ended"""
+        now = timezone.now()
+        by_driver, pending = {}, {}
+        for log in logs:
+            if log.duty_status not in cls.ON_DUTY_STATUSES:
+                continue
+            end = cls._log_span(log.log_date, log.start_time, log.duration_hours)[1]
+            if end > now:
+                # Planned; catch_up() counts it once it has happened
+                pending[log.driver_id] = min(end, pending.get(log.driver_id, end))
+                continue
+            by_driver.setdefault(log.driver_id, []).append(log)
+        if not by_driver and not pending:
+            return
+        
+        with transaction.atomic():
+            for driver_id, end in pending.items():
+                cls.objects.filter(
+                    models.Q(pending_end__isnull=True) | models.Q(pending_end__gt=end), driver_id=driver_id
+                ).update(pending_end=end)
+            if not by_driver:
+                return
+            
+            states = {
+                state.driver_id: state
+                for state in cls.objects.select_for_update().filter(driver_id__in=by_driver)
+            }
+            
+            changed, rebuild = [], []
+            for driver_id, driver_logs in by_driver.items():
+                state = states.get(driver_id)
+                if state is None or state.stale:
+                    # The saved logs are already in the table, so the rebuild includes them
+                    rebuild.append(driver_id)
+                    continue
+                
+                driver_logs.sort(key=lambda log: (log.log_date, log.start_time))
+                for log in driver_logs:
+                    start, end = cls._log_span(log.log_date, log.start_time, log.duration_hours)
+                    if not state._advance(log.log_date, start, end, log.duration_hours):
+                        rebuild.append(driver_id)
+                        break
+                else:
+                    changed.append(state)
+            
+            if changed:
+                cls.objects.bulk_update(
+                    changed, ['window_end', 'daily_hours', 'cycle_hours', 'last_on_duty_end', 'last_restart_at']
+                )
+            if rebuild:
+                cls.rebuild(rebuild)
+    
+    @classmethod
+    def mark_stale(cls, driver_ids):
+        # A plain UPDATE: never creates rows, so it is safe inside a driver's delete cascade
+        cls.objects.filter(driver_id__in=driver_ids).update(stale=True)
+    
+    @classmethod
+    def rebuild(cls, driver_ids=None) -> dict:
+        """Recompute states from the ended logs of each driver's latest window; returns {driver_id: state}"""
+        if driver_ids is None:
+            driver_ids = list(Driver.objects.values_list('id', flat=True))
+        
+        now = timezone.now()
+        on_duty = ELDLog.objects.filter(duty_status__in=cls.ON_DUTY_STATUSES, log_date__lte=timezone.localdate(now))
+        latest = dict(
+            on_duty.filter(driver_id__in=driver_ids).values_list('driver_id').annotate(
+                latest=models.Max('log_date')
+            ).order_by()
+        )
         
-        return daily_on_duty > 14
+        states = {}
+        with transaction.atomic():
+            for driver_id in driver_ids:
+                state = cls(driver_id=driver_id)
+                if driver_id in latest:
+                    # Two days before the window, to know when the first on-duty period in it began
+                    since = latest[driver_id] - timedelta(days=cls.CYCLE_DAYS + 1)
+                    spans = on_duty.filter(driver_id=driver_id, log_date__gte=since).order_by(
+                        'log_date', 'start_time'
+                    ).values_list('log_date', 'start_time', 'duration_hours')
+                    
+                    for log_date, start_time, hours in spans:
+                        start, end = cls._log_span(log_date, start_time, hours)
+                        if end > now:
+                            break
+                        if state.last_on_duty_end and start < state.last_on_duty_end:
+                            # Overlapping entries: count the hours, keep the later end
+                            end = max(end, state.last_on_duty_end)
+                            start = state.last_on_duty_end
+                        state._advance(log_date, start, end, hours)
+                    # Finds no more ended logs than the loop above; looks for the first planned one
+                    state._fold(now)
+                
+                states[driver_id], _ = cls.objects.update_or_create(
+                    driver_id=driver_id,
+                    defaults={
+                        'window_end': state.window_end,
+                        'daily_hours': state.daily_hours,
+                        'cycle_hours': state.cycle_hours,
+                        'last_on_duty_end': state.last_on_duty_end,
+                        'last_restart_at': state.last_restart_at,
+                        'pending_end': state.pending_end,
+                        'stale': False,
+                    }
+                )
+        return states
 
-class RestStop(models.Model):
+class RestStop(TripChildMixin, models.Model):
     STOP_TYPE_CHOICES = [
         ('fuel', 'Fuel Stop'),
         ('rest', 'Mandatory Rest'),
@@ -158,7 +686,7 @@ class RestStop(models.Model):
         ('dropoff', 'Dropoff Location'),
     ]
     
-    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='rest_stops')
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='rest_stops', db_index=False)
     stop_type = models.CharField(max_length=20, choices=STOP_TYPE_CHOICES)
     
     # Location and timing
@@ -175,8 +703,91 @@ class RestStop(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = TripChildQuerySet.as_manager()
+    
     class Meta:
         ordering = ['distance_from_start_miles']
+        indexes = [
+            models.Index(fields=['trip', 'distance_from_start_miles'], name='reststop_trip_order_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stop_type} - {self.location.get('address', 'Unknown location')}"
+class PlanningJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name='planning_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the worker's heartbeat while running; a job past it is presumed abandoned
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Oldest queued job first
+            models.Index(fields=['status', 'created_at', 'id'], name='planningjob_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Planning job {self.id} for trip {self.trip_id} ({self.status})"
+
+class CacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)  # sha256 of the normalized lookup
+    label = models.TextField(blank=True)
+    value = models.JSONField(null=True, blank=True)  # null caches a negative result
+    
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(fields=['created_at'], name='%(class)s_created_idx'),
+        ]
+    
+    def __str__(self):
+        return self.label or self.key
+
+class GeocodeCacheEntry(CacheEntry):
+    pass
+
+class RouteCacheEntry(CacheEntry):
+    pass
+
+class CacheCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    hits = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.hits} hits / {self.misses} misses"
+
+class ProviderCircuit(models.Model):
+    """Circuit breaker state for one external provider, shared by every worker (trips/breaker.py)"""
+    STATE_CHOICES = [
+        ('closed', 'Closed'),        # calls go through
+        ('open', 'Open'),            # calls skipped until the reset timeout passes
+        ('half_open', 'Half open'),  # one probe call in flight decides
+    ]
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default='closed')
+    failures = models.PositiveIntegerField(default=0)  # consecutive, while closed
+    opened_at = models.DateTimeField(null=True, blank=True)
+    probe_started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.stop_type} - {self.location.get('address', 'Unknown location')}"
\ No newline at end of file
+        return f"{self.name}: {self.state} ({self.failures} failures)"
@@ -0,0 +1,9 @@
+# trips/pagination.py
+from rest_framework.pagination import CursorPagination
+
+class TripCursorPagination(CursorPagination):
+    # Matches the trip_created_idx index, so each page is an index range read
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
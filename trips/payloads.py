@@ -0,0 +1,75 @@
+# trips/payloads.py
+"""Rendered trip JSON, cached per trip version.
+
+Two kinds of entries live in the TRIP_PAYLOAD_CACHE alias:
+
+- trip:<id>:version -> the trip's current version, republished after every
+  committed change (see the trip_changed receiver in signals.py)
+- trip:<id>:v<version>:<variant> -> the rendered bytes of one representation
+
+A hot read is two cache lookups and no queries. Payload keys carry the version,
+so an entry is never served for newer data; superseded ones just age out.
+"""
+import gzip
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from .models import Trip
+
+def get_payload_cache():
+    return caches[settings.TRIP_PAYLOAD_CACHE]
+
+def version_key(trip_id) -> str:
+    return f'trip:{trip_id}:version'
+
+def payload_key(trip_id, version, variant: str) -> str:
+    return f'trip:{trip_id}:v{version}:{variant}'
+
+def cached_version(trip_id):
+    """The trip's version, from the cache when published; None if the trip doesn't exist"""
+    try:
+        trip_id = int(trip_id)  # '01' and 1 must share a key
+    except (TypeError, ValueError):
+        return None
+    cache = get_payload_cache()
+    version = cache.get(version_key(trip_id))
+    if version is None:
+        version = Trip.objects.filter(pk=trip_id).values_list('version', flat=True).first()
+        if version is not None:
+            # add(), not set(): a version published by a concurrent write wins
+            cache.add(version_key(trip_id), version)
+    return version
+
+def publish_versions(trip_ids):
+    """Publish the trips' versions once the current transaction commits"""
+    trip_ids = {trip_id for trip_id in trip_ids if trip_id is not None}
+    if trip_ids:
+        transaction.on_commit(lambda: _publish(trip_ids))
+
+def _publish(trip_ids):
+    cache = get_payload_cache()
+    versions = dict(Trip.objects.filter(pk__in=trip_ids).values_list('id', 'version'))
+    # Versions only go up: a callback that read its rows before a later commit's callback
+    # ran must not put the older version back
+    published = cache.get_many([version_key(trip_id) for trip_id in versions])
+    cache.set_many({
+        version_key(trip_id): version for trip_id, version in versions.items()
+        if published.get(version_key(trip_id), -1) < version
+    })
+    cache.delete_many([version_key(trip_id) for trip_id in trip_ids - versions.keys()])
+
+def get_payload(trip_id, version, variant: str, accept_gzip: bool):
+    """(body, gzipped) for a cached representation, or None"""
+    entry = get_payload_cache().get(payload_key(trip_id, version, variant))
+    if entry is None:
+        return None
+    body, gzipped = entry
+    if gzipped and not accept_gzip:
+        return gzip.decompress(body), False
+    return body, gzipped
+
+def set_payload(trip_id, version, variant: str, body: bytes):
+    gzipped = settings.TRIP_PAYLOAD_CACHE_GZIP
+    if gzipped:
+        body = gzip.compress(body, compresslevel=settings.TRIP_PAYLOAD_CACHE_GZIP_LEVEL)
+    get_payload_cache().set(payload_key(trip_id, version, variant), (body, gzipped))
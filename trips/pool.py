@@ -0,0 +1,43 @@
+# trips/pool.py
+"""Process pool for CPU-bound planning work (route simplification).
+
+Kept free of model imports at module level: pool workers import this module
+before Django is set up, and set it up in the initializer.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+
+def _init_process():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+def simplify_in_process(coordinates):
+    """{level: simplified coordinates} for every ROUTE_DETAIL_LEVELS level"""
+    from django.conf import settings
+    from .geo import simplify
+
+    return {
+        level: simplify(coordinates, options['tolerance_miles'])
+        for level, options in settings.ROUTE_DETAIL_LEVELS.items()
+    }
+
+def get_planning_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Per-process pool, started on first use and kept for later batches"""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # forkserver children start clean instead of inheriting the web worker's
+            # threads, sockets and database connections
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_process)
+            _pool_pid = os.getpid()
+        return _pool
@@ -0,0 +1,61 @@
+# trips/renderers.py
+"""orjson-backed drop-ins for DRF's JSONRenderer and JSONParser.
+
+Output parses to the same value as the stock renderer's for everything
+serializers produce: dates, times, Decimals and other non-JSON types go through
+DRF's own encoder, and U+2028/U+2029 are escaped the same way. It is not byte
+for byte the same: floats in exponent form drop the '+' and the leading zero
+of the exponent (1e20, 1e-7 rather than 1e+20, 1e-07), and NaN and Infinity
+render as null instead of raising. A request for indented output, ASCII-only
+output (UNICODE_JSON = False) or non-compact separators is handed to the stock
+renderer, as is anything orjson can't encode (integers beyond 64 bits). Without
+orjson installed both classes behave exactly like the stock ones.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Datetimes are passed through so they get DRF's format ('Z' for UTC) rather than orjson's
+    DUMPS_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder()
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=DUMPS_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Valid JSON but not valid JavaScript; the stock renderer escapes these too
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:  # orjson.JSONDecodeError and UnicodeDecodeError included
+            raise ParseError('JSON parse error - %s' % str(exc))
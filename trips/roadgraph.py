@@ -0,0 +1,289 @@
+# trips/roadgraph.py
+"""Offline HGV routing over a road graph held in compressed sparse row (CSR) arrays.
+
+`manage.py build_road_graph` turns OSM-derived GeoJSON road lines (one LineString
+per way, with the usual highway / maxspeed / oneway / hgv / ref / name tags) into
+a .npz of flat arrays:
+
+- lat, lng: node coordinates
+- offsets: the edges leaving node i are offsets[i]:offsets[i + 1]
+- targets, miles, hours, name_ids: one entry per directed edge
+- names: road names, indexed by name_ids
+
+Queries run A* on travel time. The heuristic is the great-circle distance at the
+graph's top speed, which never overestimates, so paths are optimal.
+"""
+import heapq
+import json
+import logging
+import math
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from django.conf import settings
+from .geo import EARTH_RADIUS_MILES, haversine_miles
+
+logger = logging.getLogger(__name__)
+
+HGV_MAX_SPEED_MPH = 65
+KMH_TO_MPH = 0.621371
+DEFAULT_SPEEDS_MPH = {
+    'motorway': 65, 'motorway_link': 40,
+    'trunk': 55, 'trunk_link': 35,
+    'primary': 45, 'primary_link': 30,
+    'secondary': 40, 'secondary_link': 30,
+    'tertiary': 35, 'tertiary_link': 25,
+    'unclassified': 30, 'residential': 25,
+}
+# Ways a truck can't or shouldn't use
+EXCLUDED_HIGHWAYS = {
+    'service', 'track', 'path', 'footway', 'cycleway', 'bridleway', 'steps',
+    'pedestrian', 'living_street', 'construction', 'proposed', 'raceway',
+}
+SNAP_SPEED_MPH = 25  # for the stretch between a stop and its nearest graph node
+
+def parse_maxspeed(value, highway: str) -> float:
+    """OSM maxspeed in mph; bare numbers are km/h, as OSM defines them"""
+    default = DEFAULT_SPEEDS_MPH.get(highway, 30)
+    if value is None:
+        return default
+    match = re.match(r'\s*(\d+(?:\.\d+)?)\s*(mph)?', str(value).lower())
+    if not match:
+        return default
+    speed = float(match.group(1))
+    return speed if match.group(2) else speed * KMH_TO_MPH
+
+class RoadGraph:
+    def __init__(self, lat, lng, offsets, targets, miles, hours, name_ids, names):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.miles = np.asarray(miles, dtype=np.float32)
+        self.hours = np.asarray(hours, dtype=np.float32)
+        self.name_ids = np.asarray(name_ids, dtype=np.int32)
+        self.names = [str(name) for name in names]
+
+        speeds = self.miles / np.maximum(self.hours, 1e-9)
+        self.max_speed = float(speeds.max()) if len(speeds) else HGV_MAX_SPEED_MPH
+        self._search = None
+        self._search_lock = threading.Lock()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lat)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_geojson(cls, data: Dict) -> 'RoadGraph':
+        """Build from a FeatureCollection of (Multi)LineString roads; shared coordinates become junctions"""
+        node_ids: Dict[Tuple[float, float], int] = {}
+        names: Dict[str, int] = {}
+        sources, targets, speeds, name_ids = [], [], [], []
+
+        def node(lng, lat):
+            key = (round(lat, 6), round(lng, 6))
+            if key not in node_ids:
+                node_ids[key] = len(node_ids)
+            return node_ids[key]
+
+        for feature in data.get('features', []):
+            properties = feature.get('properties') or {}
+            geometry = feature.get('geometry') or {}
+            highway = properties.get('highway', 'unclassified')
+            if highway in EXCLUDED_HIGHWAYS or properties.get('hgv') == 'no':
+                continue
+
+            if geometry.get('type') == 'LineString':
+                lines = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiLineString':
+                lines = geometry['coordinates']
+            else:
+                continue
+
+            speed = min(parse_maxspeed(properties.get('maxspeed'), highway), HGV_MAX_SPEED_MPH)
+            name = properties.get('ref') or properties.get('name') or highway
+            name_id = names.setdefault(name, len(names))
+            oneway = properties.get('oneway')
+            forward = oneway != '-1'
+            backward = oneway not in ('yes', 'true', '1', True) or oneway == '-1'
+
+            for line in lines:
+                ids = [node(point[0], point[1]) for point in line]
+                for a, b in zip(ids, ids[1:]):
+                    if a == b:
+                        continue
+                    for source, target, allowed in ((a, b, forward), (b, a, backward)):
+                        if allowed:
+                            sources.append(source)
+                            targets.append(target)
+                            speeds.append(speed)
+                            name_ids.append(name_id)
+
+        coordinates = np.array(list(node_ids), dtype=np.float64).reshape(-1, 2)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        miles = haversine_miles(
+            coordinates[sources, 0], coordinates[sources, 1],
+            coordinates[targets, 0], coordinates[targets, 1]
+        ) if len(sources) else np.zeros(0)
+
+        # CSR: edges sorted by source, offsets from the per-node edge counts
+        order = np.argsort(sources, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=len(coordinates)))))
+        return cls(
+            coordinates[:, 0], coordinates[:, 1], offsets,
+            targets[order], miles[order], (miles / np.asarray(speeds, dtype=np.float64))[order] if len(sources) else miles,
+            np.asarray(name_ids, dtype=np.int64)[order], list(names)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'RoadGraph':
+        """A built .npz graph, or GeoJSON (built on the fly; fine for small graphs)"""
+        if str(path).endswith('.npz'):
+            with np.load(path, allow_pickle=False) as arrays:
+                return cls(**{key: arrays[key] for key in arrays.files})
+        with open(path, encoding='utf-8') as f:
+            return cls.from_geojson(json.load(f))
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path, lat=self.lat, lng=self.lng, offsets=self.offsets, targets=self.targets,
+            miles=self.miles, hours=self.hours, name_ids=self.name_ids, names=np.array(self.names, dtype=str)
+        )
+
+    def nearest_node(self, lat: float, lng: float) -> Tuple[int, float]:
+        """(node index, distance in miles) of the node closest to the point"""
+        distances = haversine_miles(self.lat, self.lng, lat, lng)
+        node = int(np.argmin(distances))
+        return node, float(distances[node])
+
+    def _search_arrays(self):
+        # Plain lists index several times faster than NumPy scalars in the search loop
+        with self._search_lock:
+            if self._search is None:
+                self._search = (
+                    self.offsets.tolist(), self.targets.tolist(), self.hours.tolist(),
+                    np.radians(self.lat).tolist(), np.radians(self.lng).tolist()
+                )
+            return self._search
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """Edge indexes of the fastest path from `source` to `target`, or None if unreachable"""
+        if source == target:
+            return []
+        offsets, targets, hours, lat, lng = self._search_arrays()
+
+        target_lat, target_lng = lat[target], lng[target]
+        cos_target = math.cos(target_lat)
+        hours_per_radian = EARTH_RADIUS_MILES / self.max_speed
+
+        def heuristic(node):
+            a = (math.sin((lat[node] - target_lat) / 2) ** 2
+                 + math.cos(lat[node]) * cos_target * math.sin((lng[node] - target_lng) / 2) ** 2)
+            return 2 * math.asin(math.sqrt(min(a, 1.0))) * hours_per_radian
+
+        best = {source: 0.0}
+        came_from = {}  # node -> (previous node, edge)
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if cost > best[node]:
+                continue  # stale heap entry
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[edge]
+                new_cost = cost + hours[edge]
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    came_from[neighbour] = (node, edge)
+                    heapq.heappush(heap, (new_cost + heuristic(neighbour), new_cost, neighbour))
+        else:
+            return None
+
+        path = []
+        node = target
+        while node != source:
+            node, edge = came_from[node]
+            path.append(edge)
+        path.reverse()
+        return path
+
+    def route(self, stops: List[Dict], max_snap_miles: float) -> Optional[Dict]:
+        """Route through `stops` ([{'lat', 'lng'}, ...]) in the RouteCalculatorService result shape,
+        or None when a stop is too far from the graph or a leg is unreachable"""
+        snapped = []
+        for stop in stops:
+            node, snap_miles = self.nearest_node(stop['lat'], stop['lng'])
+            if snap_miles > max_snap_miles:
+                return None
+            snapped.append((node, snap_miles))
+
+        coordinates = [[stops[0]['lat'], stops[0]['lng']]]
+        distance = duration = 0.0
+        instructions = []
+        for i, ((source, source_snap), (target, target_snap)) in enumerate(zip(snapped, snapped[1:])):
+            path = self.shortest_path(source, target)
+            if path is None:
+                return None
+
+            nodes = [source] + [int(self.targets[edge]) for edge in path]
+            coordinates.extend([float(self.lat[n]), float(self.lng[n])] for n in nodes)
+            coordinates.append([stops[i + 1]['lat'], stops[i + 1]['lng']])
+
+            snap_miles = source_snap + target_snap
+            leg_miles = float(self.miles[path].sum()) + snap_miles
+            distance += leg_miles
+            duration += float(self.hours[path].sum()) + snap_miles / SNAP_SPEED_MPH
+            instructions.extend(self._instructions(path))
+            stop_name = 'pickup location' if i == 0 and len(stops) > 2 else 'dropoff location'
+            instructions.append(f"Arrive at {stop_name} ({leg_miles:.1f} miles)")
+
+        # Drop consecutive duplicates where a stop sits exactly on a node
+        coordinates = [point for j, point in enumerate(coordinates) if j == 0 or point != coordinates[j - 1]]
+        return {
+            'coordinates': coordinates,
+            'distance_miles': distance,
+            'duration_hours': duration,
+            'instructions': instructions,
+        }
+
+    def _instructions(self, path: List[int]) -> List[str]:
+        """One line per stretch of road with the same name"""
+        instructions = []
+        current, miles = None, 0.0
+        for edge in path:
+            name = self.names[self.name_ids[edge]]
+            if name != current and current is not None:
+                instructions.append(f"Continue on {current} ({miles:.1f} miles)")
+                miles = 0.0
+            current = name
+            miles += float(self.miles[edge])
+        if current is not None:
+            instructions.append(f"Continue on {current} ({miles:.1f} miles)")
+        return instructions
+
+_lock = threading.Lock()
+_graph = None
+_graph_path = None
+
+def get_road_graph() -> Optional[RoadGraph]:
+    """The graph at ROAD_GRAPH_PATH, loaded once per process; None when unset or unreadable"""
+    global _graph, _graph_path
+    path = settings.ROAD_GRAPH_PATH
+    if not path:
+        return None
+    with _lock:
+        if _graph_path != path:
+            _graph_path = path
+            try:
+                _graph = RoadGraph.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Road graph %s not loaded: %s", path, e)
+                _graph = None
+        return _graph
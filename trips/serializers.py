@@ -1,46 +1,83 @@
 # trips/serializers.py
+from base64 import b64encode
 from rest_framework import serializers, validators
-from .models import Driver, Trip, ELDLog, RestStop
+from .models import Driver, Trip, ELDLog, RestStop, PlanningJob
+from .instrumentation import TimedRepresentationMixin
 
-class DriverSerializer(serializers.ModelSerializer):
+class DriverSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(source='user.get_full_name', read_only=True)
     
     class Meta:
         model = Driver
         fields = ['id', 'full_name', 'license_number', 'current_cycle_hours']
 
-class RestStopSerializer(serializers.ModelSerializer):
+class RestStopSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = RestStop
         fields = '__all__'
 
-class ELDLogSerializer(serializers.ModelSerializer):
+class ELDLogSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = ELDLog
         fields = '__all__'
 
-class TripSerializer(serializers.ModelSerializer):
+class TripSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     driver_info = DriverSerializer(source='driver', read_only=True)
     rest_stops = RestStopSerializer(many=True, read_only=True)
     eld_logs = ELDLogSerializer(many=True, read_only=True)
+    route_coordinates = serializers.SerializerMethodField()
     
     class Meta:
         model = Trip
         fields = [
             'id', 'driver', 'driver_info', 'status',
             'current_location', 'pickup_location', 'dropoff_location',
-            'total_distance_miles', 'estimated_drive_time_hours', 'current_cycle_used_hours',
+            'total_distance_miles', 'estimated_drive_time_hours', 'current_cycle_used_hours', 'total_days',
             'route_coordinates', 'waypoints', 'rest_stops', 'eld_logs',
-            'created_at', 'trip_start_time', 'trip_end_time', 'requires_multiple_days'
+            'created_at', 'planned_departure', 'trip_start_time', 'trip_end_time', 'requires_multiple_days'
+        ]
+    
+    def get_route_coordinates(self, trip):
+        """[[lat, lng], ...] at the requested detail level, or the stored blob
+        base64-encoded with ?route_format=packed"""
+        source, field_name = trip, 'route_coordinates'
+        
+        detail = self.context.get('route_detail', 'full')
+        if detail != 'full':
+            level = trip.route_levels.filter(level=detail).first()
+            if level is not None:
+                source, field_name = level, 'coordinates'
+        
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('route_format') == 'packed':
+            packed = source._meta.get_field(field_name).get_packed(source)
+            return b64encode(packed).decode('ascii') if packed else None
+        return getattr(source, field_name)
+
+class TripSummarySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """List view: no nested stops, logs or route geometry"""
+    
+    class Meta:
+        model = Trip
+        fields = [
+            'id', 'driver', 'status',
+            'total_distance_miles', 'estimated_drive_time_hours', 'total_days',
+            'created_at', 'planned_departure', 'trip_start_time', 'trip_end_time'
         ]
 
 class TripCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = [
-            'current_location', 'pickup_location', 'dropoff_location', 'current_cycle_used_hours'
+            'current_location', 'pickup_location', 'dropoff_location', 'current_cycle_used_hours',
+            'planned_departure'  # optional
         ]
 
+class PlanningJobSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    class Meta:
+        model = PlanningJob
+        fields = ['id', 'trip', 'status', 'attempts', 'error', 'created_at', 'started_at', 'finished_at']
+
 class ELDLogCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ELDLog
@@ -1,76 +1,223 @@
-import math
-from datetime import datetime, timedelta, time, date
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import httpx
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta
 from django.conf import settings
-from geopy.distance import geodesic
-from geopy.geocoders import Nominatim
-from openrouteservice import Client
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils import timezone
 from openrouteservice.directions import directions
 from typing import Dict, List
-from json import loads
+from .breaker import CircuitOpen, get_breaker
+from .cache import get_cache, lane_key, normalize_address
+from .clients import get_geolocator, get_ors_client, provider_timeout
+from .db import write_transaction
+from .geo import RouteIndex, cumulative_miles, geodesic_miles, simplify
+from .hos import HOSSimulator
+from .instrumentation import collect, timed
+from .models import DailyDutyTotals, DriverCycleState, ELDLog, PlanningJob, RestStop, Trip, TripRouteLevel
+from .pool import get_planning_pool, simplify_in_process
+from .roadgraph import get_road_graph
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed planning job stays reserved without a heartbeat from its worker
+JOB_LEASE = timedelta(seconds=60)
 
 class RouteCalculatorService:
+    NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+    
     def __init__(self):
         self.base_url = "https://api.openrouteservice.org/v2/"
         self.api_key = settings.OPENROUTE_API_KEY
-        self.geolocator = Nominatim(user_agent="eld_app")
+        self.geolocator = get_geolocator()
     
     def geocode_address(self, address: str) -> Dict:
+        """{'lat', 'lng'} for the address, None if it isn't found; raises CircuitOpen while Nominatim is failing"""
+        cache = get_cache('geocode')
+        normalized = normalize_address(address)
+        found, cached = cache.get(normalized)
+        if found:
+            return cached
+        
         try:
-            location = self.geolocator.geocode(address)
-            print(location)
+            with get_breaker('nominatim').call(), timed('nominatim'):
+                location = self.geolocator.geocode(address)
+            result = None
             if location:
-                return {
+                result = {
                     'lat': location.latitude,
                     'lng': location.longitude,
                 }
+            cache.set(normalized, result)
+            return result
+        except CircuitOpen:
+            raise  # Nominatim is failing; there is no fallback, so the caller answers 503
         except Exception as e:
-            print(f"Geocoding error: {e}")
+            logger.warning("Geocoding failed for %r: %s", address, e)
         
         return None
     
     def calculate_route(self, current_location: Dict, pickup_location: Dict, dropoff_location: Dict) -> Dict:
-        client = Client(key=self.api_key)
+        cache = get_cache('route')
+        lane = lane_key(current_location, pickup_location, dropoff_location)
+        found, cached = cache.get(lane)
+        if found:
+            return cached
+        
+        if settings.ROUTING_PRIMARY == 'local':
+            route_data = self._calculate_local_route(current_location, pickup_location, dropoff_location)
+            if route_data:
+                return route_data
+        
+        client = get_ors_client()
         start_coords = (current_location['lng'], current_location['lat'])
         pickup_coords = (pickup_location['lng'], pickup_location['lat'])
         drop_coords = (dropoff_location['lng'], dropoff_location['lat'])
         coords = [start_coords, pickup_coords, drop_coords]
         try:
-            response = directions(client=client, coordinates=coords, profile="driving-hgv", format="geojson", instructions=True, elevation=True, units='mi')
+            with get_breaker('ors').call(), timed('ors'):
+                response = directions(client=client, coordinates=coords, profile="driving-hgv", format="geojson", instructions=True, elevation=True, units='mi')
             if response:
-                data = loads(response)
-                route = data['features'][0]
-                
-                # Extract route information
-                properties = route['properties']
-                coordinates = route['geometry']['coordinates']
-                
-                # Convert to lat, lng format for frontend
-                route_coordinates = [[coord[1], coord[0]] for coord in coordinates]
-                
-                return {
-                    'coordinates': route_coordinates,
-                    'distance_miles': properties['segments'][0]['distance'],  
-                    'duration_hours': properties['segments'][0]['duration'],
-                    'instructions': self._parse_instructions(properties['segments'][0]['steps'])
-                }
+                route_data = self._route_from_geojson(response)
+                # Only provider answers are cached; the straight-line fallback is not
+                cache.set(lane, route_data)
+                return route_data
+        except CircuitOpen:
+            pass  # ORS is failing; straight to the fallback
         except Exception as e:
-            print(f"Route Calculation error: {e}")
+            logger.warning("Route calculation failed, using fallback: %s", e)
         
         return self._calculate_fallback_route(current_location, pickup_location, dropoff_location)
     
+    async def ageocode_address(self, address: str, client: httpx.AsyncClient) -> Dict:
+        """geocode_address() over the request's async HTTP client (clients.async_http_client());
+        the event loop stays free while Nominatim answers"""
+        cache = get_cache('geocode')
+        normalized = normalize_address(address)
+        found, cached = await sync_to_async(cache.get)(normalized)
+        if found:
+            return cached
+        
+        try:
+            async with get_breaker('nominatim').acall():
+                with timed('nominatim'):
+                    response = await client.get(
+                        self.NOMINATIM_SEARCH_URL,
+                        params={'q': address, 'format': 'json', 'limit': 1},
+                        timeout=provider_timeout('nominatim', settings.NOMINATIM_TIMEOUT)
+                    )
+                    response.raise_for_status()
+            places = response.json()
+            result = None
+            if places:
+                result = {
+                    'lat': float(places[0]['lat']),
+                    'lng': float(places[0]['lon']),
+                }
+            await sync_to_async(cache.set)(normalized, result)
+            return result
+        except CircuitOpen:
+            raise  # Nominatim is failing; there is no fallback, so the caller answers 503
+        except Exception as e:
+            logger.warning("Geocoding failed for %r: %s", address, e)
+        
+        return None
+    
+    async def acalculate_route(self, current_location: Dict, pickup_location: Dict, dropoff_location: Dict,
+                               client: httpx.AsyncClient) -> Dict:
+        """calculate_route() with the ORS request made on the request's async HTTP client"""
+        cache = get_cache('route')
+        lane = lane_key(current_location, pickup_location, dropoff_location)
+        found, cached = await sync_to_async(cache.get)(lane)
+        if found:
+            return cached
+        
+        stops = (current_location, pickup_location, dropoff_location)
+        if settings.ROUTING_PRIMARY == 'local':
+            route_data = await sync_to_async(self._calculate_local_route, thread_sensitive=False)(*stops)
+            if route_data:
+                return route_data
+        
+        try:
+            async with get_breaker('ors').acall():
+                with timed('ors'):
+                    response = await client.post(
+                        f"{self.base_url}directions/driving-hgv/geojson",
+                        json={
+                            'coordinates': [[stop['lng'], stop['lat']] for stop in stops],
+                            'instructions': True,
+                            'elevation': True,
+                            'units': 'mi',
+                        },
+                        headers={'Authorization': self.api_key},
+                        timeout=provider_timeout('ors', settings.ORS_TIMEOUT)
+                    )
+                    response.raise_for_status()
+            route_data = self._route_from_geojson(response.json())
+            await sync_to_async(cache.set)(lane, route_data)
+            return route_data
+        except CircuitOpen:
+            pass  # ORS is failing; straight to the fallback
+        except Exception as e:
+            logger.warning("Route calculation failed, using fallback: %s", e)
+        
+        # CPU-bound; off the event loop, but needs no database connection
+        return await sync_to_async(self._calculate_fallback_route, thread_sensitive=False)(*stops)
+    
+    def _route_from_geojson(self, data: Dict) -> Dict:
+        """Route result from an ORS GeoJSON directions response"""
+        route = data['features'][0]
+        
+        # Extract route information
+        properties = route['properties']
+        coordinates = route['geometry']['coordinates']
+        
+        # Convert to lat, lng format for frontend
+        route_coordinates = [[coord[1], coord[0]] for coord in coordinates]
+        
+        # The summary covers every leg; distances are in the requested units (miles), durations in seconds
+        summary = properties['summary']
+        return {
+            'coordinates': route_coordinates,
+            'distance_miles': summary['distance'],
+            'duration_hours': summary['duration'] / 3600,
+            'instructions': self._parse_instructions(
+                [step for segment in properties['segments'] for step in segment['steps']]
+            )
+        }
+    
     def _calculate_fallback_route(self, current: Dict, pickup: Dict, dropoff: Dict) -> Dict:
+        """Offline road graph when it covers all three stops, straight lines otherwise"""
+        if settings.ROUTING_PRIMARY != 'local':
+            route_data = self._calculate_local_route(current, pickup, dropoff)
+            if route_data:
+                return route_data
+        return self._calculate_straight_line_route(current, pickup, dropoff)
+    
+    def _calculate_local_route(self, current: Dict, pickup: Dict, dropoff: Dict):
+        """Route over the offline road graph (trips/roadgraph.py); None when it can't"""
+        graph = get_road_graph()
+        if graph is None:
+            return None
+        with timed('local_router'):
+            return graph.route([current, pickup, dropoff], settings.ROAD_GRAPH_MAX_SNAP_MILES)
+    
+    def _calculate_straight_line_route(self, current: Dict, pickup: Dict, dropoff: Dict) -> Dict:
         """Fallback route calculation using straight-line distance"""
         
-        # Calculate distances
-        current_to_pickup = geodesic(
-            (current['lat'], current['lng']), 
-            (pickup['lat'], pickup['lng'])
-        ).miles
-        
-        pickup_to_dropoff = geodesic(
-            (pickup['lat'], pickup['lng']), 
-            (dropoff['lat'], dropoff['lng'])
-        ).miles
+        # Calculate both legs in one batched call
+        current_to_pickup, pickup_to_dropoff = geodesic_miles(
+            [current['lat'], pickup['lat']],
+            [current['lng'], pickup['lng']],
+            [pickup['lat'], dropoff['lat']],
+            [pickup['lng'], dropoff['lng']]
+        ).tolist()
         
         total_distance = current_to_pickup + pickup_to_dropoff
         
@@ -99,211 +246,408 @@ class RouteCalculatorService:
         instructions = []
         for step in steps:
             if 'instruction' in step:
-                distance_miles = step['distance'] * 0.000621371
-                instructions.append(f"{step['instruction']} ({distance_miles:.1f} miles)")
+                instructions.append(f"{step['instruction']} ({step['distance']:.1f} miles)")
         return instructions
 
 class ELDComplianceService:
-    # HOS Rules (Property-carrying drivers)
-    MAX_DRIVING_HOURS_DAILY = 11
-    MAX_ON_DUTY_HOURS_DAILY = 14
-    MAX_CYCLE_HOURS = 70  # 8-day cycle
-    MANDATORY_BREAK_HOURS = 0.5  # 30-minute break after 8 hours
-    MIN_OFF_DUTY_HOURS = 10  # Between shifts
+    """Plans a trip's duty segments and stops with the HOS simulator"""
     
     def generate_compliance_plan(self, trip) -> Dict:
-        total_drive_hours = trip.estimated_drive_time_hours
-        pickup_dropoff_hours = 2.0  # 1 hour each for pickup/dropoff
-        total_on_duty_hours = total_drive_hours + pickup_dropoff_hours
-        
-        # Calculate how many days the trip will take
-        available_drive_hours = min(
-            self.MAX_DRIVING_HOURS_DAILY,
-            self.MAX_CYCLE_HOURS - trip.current_cycle_used_hours
+        route_index = RouteIndex.for_trip(trip)
+        pickup_miles = route_index.miles_to(trip.pickup_location) if trip.pickup_location else 0.0
+        
+        simulation = HOSSimulator(route_index.locate).simulate(
+            departure=self.departure_for(trip),
+            distance_miles=trip.total_distance_miles or 0.0,
+            drive_hours=trip.estimated_drive_time_hours or 0.0,
+            cycle_hours_used=trip.current_cycle_used_hours,
+            pickup_miles=pickup_miles
         )
+        days_required = len({log['log_date'] for log in simulation['eld_logs']})
         
-        days_required = math.ceil(total_drive_hours / available_drive_hours)
+        return {
+            'rest_stops': simulation['rest_stops'],
+            'eld_logs': simulation['eld_logs'],
+            'total_days': days_required,
+            'compliance_summary': {
+                'total_drive_hours': simulation['driving_hours'],
+                'total_on_duty_hours': simulation['on_duty_hours'],
+                'days_required': days_required,
+                'arrival': simulation['arrival'],
+                'cycle_hours_used': simulation['cycle_hours_used']
+            }
+        }
+    
+    def departure_for(self, trip) -> datetime:
+        """The trip's planned departure if given, else now rounded up to the quarter hour, in local time"""
+        if trip.planned_departure:
+            return timezone.localtime(trip.planned_departure)
         
-        # Generate day-by-day plan
-        rest_stops = []
-        eld_logs = []
-        current_date = date.today()
+        now = timezone.localtime().replace(second=0, microsecond=0)
+        return now + timedelta(minutes=-now.minute % 15)
+    
+    @write_transaction()
+    def save_compliance_plan(self, trip, compliance_plan: Dict):
+        """Validate the plan in memory and persist it with batched inserts"""
+        rest_stops = [RestStop(trip=trip, **stop_data) for stop_data in compliance_plan['rest_stops']]
+        eld_logs = [
+            ELDLog(trip=trip, driver=trip.driver, **log_data)
+            for log_data in compliance_plan['eld_logs']
+        ]
         
-        remaining_drive_hours = total_drive_hours
-        distance_covered = 0
+        ELDLog.validate_batch(eld_logs)
         
-        for day in range(days_required):
-            day_date = current_date + timedelta(days=day)
-            
-            # Calculate hours for this day
-            if day == 0:
-                # First day: account for current cycle usage
-                daily_drive_hours = min(
-                    remaining_drive_hours,
-                    self.MAX_DRIVING_HOURS_DAILY,
-                    max(0, self.MAX_CYCLE_HOURS - trip.current_cycle_used_hours)
-                )
+        RestStop.objects.bulk_create(rest_stops)
+        ELDLog.objects.bulk_create(eld_logs)
+        DailyDutyTotals.apply(DailyDutyTotals.deltas_for(eld_logs))
+        DriverCycleState.record(eld_logs)
+        Trip.bump_versions([trip.id])
+
+class TripPlanningService:
+    """Runs routing and compliance planning for queued trips outside the request cycle"""
+    
+    def enqueue(self, trip) -> PlanningJob:
+        return PlanningJob.objects.create(trip=trip)
+    
+    def plan_trip(self, trip, route_data: Dict = None):
+        """Route (unless `route_data` is given) and plan `trip`, then save the plan"""
+        eld_service = ELDComplianceService()
+        
+        if route_data is None:
+            route_data = RouteCalculatorService().calculate_route(
+                current_location=trip.current_location,
+                pickup_location=trip.pickup_location,
+                dropoff_location=trip.dropoff_location
+            )
+        self.apply_route(trip, route_data)
+        self.apply_cycle(trip)
+        
+        compliance_plan = eld_service.generate_compliance_plan(trip)
+        trip.total_days = compliance_plan['total_days']
+        levels = self.build_route_levels(trip) if trip.route_coordinates else []
+        
+        # Everything is computed; one short write transaction stores it
+        with write_transaction():
+            trip.save()
+            self.save_route_levels(trip, levels)
+            eld_service.save_compliance_plan(trip, compliance_plan)
+        return compliance_plan
+    
+    def apply_route(self, trip, route_data: Dict):
+        trip.route_coordinates = route_data['coordinates']
+        trip.route_cumulative_miles = cumulative_miles(route_data['coordinates']).tolist()
+        trip.total_distance_miles = route_data['distance_miles']
+        trip.estimated_drive_time_hours = route_data['duration_hours']
+    
+    def apply_cycle(self, trip, state: DriverCycleState = None):
+        """Plan against the driver's logged 8-day on-duty total instead of the client-entered one
+        
+        The entered figure is kept for drivers with no on-duty history here yet.
+        """
+        if state is None:
+            state = DriverCycleState.for_driver(trip.driver_id)
+        # As of departure: days that will have left the window drop out, earlier planned trips count
+        departure = ELDComplianceService().departure_for(trip)
+        state = state.as_of(departure)
+        if state.window_end is not None:
+            trip.current_cycle_used_hours = state.hours_at(departure)
+    
+    def build_route_levels(self, trip, simplified: Dict = None) -> List[TripRouteLevel]:
+        """TripRouteLevel rows for `trip`; `simplified` maps level to already simplified coordinates"""
+        levels = []
+        for level, options in settings.ROUTE_DETAIL_LEVELS.items():
+            tolerance = options['tolerance_miles']
+            if simplified and level in simplified:
+                coordinates = simplified[level]
             else:
-                daily_drive_hours = min(remaining_drive_hours, self.MAX_DRIVING_HOURS_DAILY)
-            
-            # Generate ELD logs for this day
-            day_logs = self._generate_daily_logs(day_date, daily_drive_hours, day == 0)
-            eld_logs.extend(day_logs)
+                coordinates = simplify(trip.route_coordinates, tolerance)
+            levels.append(TripRouteLevel(
+                trip=trip,
+                level=level,
+                tolerance_miles=tolerance,
+                point_count=len(coordinates),
+                coordinates=coordinates
+            ))
+        return levels
+    
+    def save_route_levels(self, trip, levels: List[TripRouteLevel] = None):
+        """Store the simplified geometries served by ?detail= and ?zoom=; built here unless given"""
+        if levels is None:
+            levels = self.build_route_levels(trip) if trip.route_coordinates else []
+        with write_transaction():
+            trip.route_levels.all().delete()
+            if levels:
+                TripRouteLevel.objects.bulk_create(levels)
+                Trip.bump_versions([trip.id])
+    
+    def claim_next_job(self, lease: timedelta = JOB_LEASE):
+        """Atomically move the oldest queued job to running under a lease; None when the queue is empty"""
+        while True:
+            job = PlanningJob.objects.filter(status='queued').order_by('created_at', 'id').first()
+            if job is None:
+                return None
             
-            # Calculate rest stops for this day
-            if daily_drive_hours > 8:
-                # Need 30-minute break
-                distance_for_break = (distance_covered + 
-                                    (8 / total_drive_hours) * trip.total_distance_miles)
+            now = timezone.now()
+            claimed = PlanningJob.objects.filter(pk=job.pk, status='queued').update(
+                status='running',
+                started_at=now,
+                lease_expires_at=now + lease,
+                attempts=job.attempts + 1
+            )
+            if claimed:
+                job.status, job.started_at, job.attempts = 'running', now, job.attempts + 1
+                job.lease_expires_at = now + lease
+                return job
+            # Another worker took it first; try the next one
+    
+    def run_job(self, job: PlanningJob, max_attempts: int = 3, lease: timedelta = JOB_LEASE):
+        with collect() as timings, self.heartbeat(job, lease):
+            job = self._run_job(job, max_attempts)
+        timings.log('planning_job', job_id=job.id, trip_id=job.trip_id, status=job.status, attempts=job.attempts)
+        return job
+    
+    @contextmanager
+    def heartbeat(self, job: PlanningJob, lease: timedelta):
+        """Renew the job's lease every third of its length until the block exits"""
+        stop = threading.Event()
+        
+        def renew():
+            try:
+                while not stop.wait(lease.total_seconds() / 3):
+                    try:
+                        PlanningJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+                            lease_expires_at=timezone.now() + lease
+                        )
+                    except DatabaseError as e:
+                        logger.warning("Lease renewal for planning job %s failed: %s", job.id, e)
+            finally:
+                connection.close()  # this thread's own connection
+        
+        thread = threading.Thread(target=renew, name=f'planning-job-{job.id}-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+    
+    def _run_job(self, job: PlanningJob, max_attempts: int):
+        try:
+            trip = job.trip
+            # A requeued job may already have written its plan before its worker died
+            trip.rest_stops.all().delete()
+            trip.eld_logs.all().delete()
+            self.plan_trip(trip)
+        except Exception as e:
+            logger.warning("Planning job %s failed: %s", job.id, e)
+            job.error = f'Route calculation failed: {str(e)}'
+            # HOS validation failures won't change on retry
+            retryable = not isinstance(e, ValidationError) and job.attempts < max_attempts
+            job.status = 'queued' if retryable else 'failed'
+            job.finished_at = timezone.now() if job.status == 'failed' else None
+        else:
+            job.error = ''
+            job.status = 'done'
+            job.finished_at = timezone.now()
+        
+        # Only while this attempt still holds the job: once its lease expired it belongs to the requeue
+        recorded = PlanningJob.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+            status=job.status, error=job.error, finished_at=job.finished_at, lease_expires_at=None
+        )
+        if not recorded:
+            logger.warning("Planning job %s lost its lease during attempt %s; outcome not recorded", job.id, job.attempts)
+            job.refresh_from_db()
+        return job
+    
+    def requeue_stale_jobs(self, max_attempts: int = 3, lease: timedelta = JOB_LEASE):
+        """Put back running jobs whose lease expired, failing those already tried `max_attempts` times
+        
+        Returns (requeued, failed). Jobs claimed before leases existed expire `lease` after they started.
+        """
+        now = timezone.now()
+        expired = PlanningJob.objects.filter(
+            Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True, started_at__lt=now - lease),
+            status='running'
+        )
+        failed = expired.filter(attempts__gte=max_attempts).update(
+            status='failed',
+            error='Planning worker stopped responding',
+            finished_at=now,
+            lease_expires_at=None
+        )
+        requeued = expired.update(status='queued', lease_expires_at=None)
+        return requeued, failed
+
+class BatchPlanningService:
+    """Plans many trips for one driver in one call: each distinct lane is routed once, routing
+    runs on a thread pool, route simplification on a process pool and everything is saved in bulk
+    
+    Compliance plans run in request order. A trip without a planned departure leaves once the
+    driver is rested from the trip before it (or from their last stored log), and one whose
+    planned departure is earlier than that is rejected, so a batch never stores overlapping logs.
+    """
+    
+    def plan_batch(self, driver, trip_specs: Dict[int, Dict]) -> Dict[int, Dict]:
+        """`trip_specs` maps item index to validated TripCreateSerializer data; returns a result per index"""
+        results = {}
+        trips = {index: Trip(driver=driver, **spec) for index, spec in trip_specs.items()}
+        
+        planner = TripPlanningService()
+        cycle_state = DriverCycleState.for_driver(driver.id)
+        for trip in trips.values():
+            planner.apply_cycle(trip, cycle_state)
+        
+        routed = self._route(trips, results)
+        planned = self._plan(driver, routed, results)
+        self._save(planned, results)
+        return results
+    
+    def _route(self, trips: Dict[int, Trip], results: Dict) -> Dict[int, Trip]:
+        lanes = {}
+        for index, trip in trips.items():
+            lane = lane_key(trip.current_location, trip.pickup_location, trip.dropoff_location)
+            lanes.setdefault(lane, []).append(index)
+        
+        def route_lane(indexes):
+            trip = trips[indexes[0]]
+            try:
+                return RouteCalculatorService().calculate_route(
+                    current_location=trip.current_location,
+                    pickup_location=trip.pickup_location,
+                    dropoff_location=trip.dropoff_location
+                )
+            finally:
+                # Each pool thread gets its own connection for the route cache
+                connection.close()
+        
+        planner = TripPlanningService()
+        routed = {}
+        with ThreadPoolExecutor(max_workers=settings.BATCH_ROUTING_THREADS) as executor:
+            # A copied context per task keeps provider timings flowing to the request's collector
+            futures = {
+                executor.submit(contextvars.copy_context().run, route_lane, indexes): indexes
+                for indexes in lanes.values()
+            }
+            for future, indexes in futures.items():
+                try:
+                    route_data = future.result()
+                except Exception as e:
+                    for index in indexes:
+                        results[index] = {'index': index, 'status': 'error', 'error': f'Route calculation failed: {e}'}
+                    continue
                 
-                rest_stops.append({
-                    'stop_type': 'break',
-                    'location': self._interpolate_location(
-                        trip.route_coordinates, 
-                        distance_for_break / trip.total_distance_miles
-                    ),
-                    'scheduled_arrival': datetime.combine(
-                        day_date, 
-                        time(12, 0)  # Approximate break time
-                    ),
-                    'duration_hours': 0.5,
-                    'distance_from_start_miles': distance_for_break,
-                    'is_mandatory': True,
-                    'hos_reason': '30-minute break required after 8 hours driving'
-                })
-            
-            # Add fuel stop if needed (every 1000 miles)
-            if distance_covered > 0 and distance_covered % 1000 < 200:
-                rest_stops.append({
-                    'stop_type': 'fuel',
-                    'location': self._interpolate_location(
-                        trip.route_coordinates, 
-                        distance_covered / trip.total_distance_miles
-                    ),
-                    'scheduled_arrival': datetime.combine(day_date, time(18, 0)),
-                    'duration_hours': 0.5,
-                    'distance_from_start_miles': distance_covered,
-                    'is_mandatory': False,
-                    'hos_reason': 'Fuel stop (1000+ miles)'
-                })
+                for index in indexes:
+                    planner.apply_route(trips[index], route_data)
+                    routed[index] = trips[index]
+        return routed
+    
+    def _plan(self, driver, trips: Dict[int, Trip], results: Dict) -> Dict[int, tuple]:
+        """(trip, rest stops, logs, simplified levels) per trip whose plan passes validation"""
+        simplified = self._simplify(trips)
+        eld_service = ELDComplianceService()
+        
+        free_at = self._driver_free_at(driver)
+        earliest = min([timezone.localtime(), *(trip.planned_departure for trip in trips.values() if trip.planned_departure)])
+        # Stored driving hours from the earliest day the batch can touch; later trips are checked against earlier ones
+        daily_driving = {
+            (driver.id, log_date): hours
+            for log_date, hours in DailyDutyTotals.objects.filter(
+                driver=driver, log_date__gte=timezone.localdate(earliest)
+            ).values_list('log_date', 'driving_hours')
+        }
+        
+        planned = {}
+        previous = None  # compliance summary of the last planned trip
+        for index in sorted(trips):
+            trip = trips[index]
+            departure = eld_service.departure_for(trip)
+            if free_at is not None and departure < free_at:
+                if trip.planned_departure:
+                    results[index] = {
+                        'index': index,
+                        'status': 'error',
+                        'error': f"Departs before the driver is rested from their previous trip; "
+                                 f"the earliest departure is {free_at.isoformat()}",
+                    }
+                    continue
+                departure = free_at
+            trip.planned_departure = departure
+            # The earlier trip's hours still count unless there's a 34-hour restart in between
+            restart = timedelta(hours=HOSSimulator.RESTART_HOURS)
+            if previous is not None and departure - previous['arrival'] < restart:
+                trip.current_cycle_used_hours = previous['cycle_hours_used']
             
-            remaining_drive_hours -= daily_drive_hours
-            distance_covered += (daily_drive_hours / total_drive_hours) * trip.total_distance_miles
+            try:
+                plan = eld_service.generate_compliance_plan(trip)
+                eld_logs = [ELDLog(trip=trip, driver=driver, **log_data) for log_data in plan['eld_logs']]
+                ELDLog.validate_batch(eld_logs, daily_driving)
+            except ValidationError as e:
+                results[index] = {'index': index, 'status': 'error', 'error': ' '.join(e.messages)}
+                continue
+            except Exception as e:
+                results[index] = {'index': index, 'status': 'error', 'error': f'Planning failed: {e}'}
+                continue
             
-            # Add mandatory rest if more days needed
-            if remaining_drive_hours > 0:
-                rest_stops.append({
-                    'stop_type': 'rest',
-                    'location': self._interpolate_location(
-                        trip.route_coordinates, 
-                        distance_covered / trip.total_distance_miles
-                    ),
-                    'scheduled_arrival': datetime.combine(day_date, time(22, 0)),
-                    'duration_hours': 10,
-                    'distance_from_start_miles': distance_covered,
-                    'is_mandatory': True,
-                    'hos_reason': f'Mandatory 10-hour rest before day {day + 2}'
-                })
+            trip.total_days = plan['total_days']
+            rest_stops = [RestStop(trip=trip, **stop_data) for stop_data in plan['rest_stops']]
+            planned[index] = (trip, rest_stops, eld_logs, simplified.get(index))
+            previous = plan['compliance_summary']
+            free_at = HOSSimulator.rested_departure(previous['arrival'])
         
+        # Simplification results, only for the trips that will be saved
+        for index, (trip, rest_stops, eld_logs, levels) in planned.items():
+            if levels is not None and not isinstance(levels, dict):
+                try:
+                    levels = levels.result()
+                except Exception as e:
+                    logger.warning("Route simplification failed for batch item %s: %s", index, e)
+                    levels = None
+                planned[index] = (trip, rest_stops, eld_logs, levels)
+        return planned
+    
+    def _simplify(self, trips: Dict[int, Trip]) -> Dict:
+        """Futures of simplified route levels on the process pool, for batches big enough to use it"""
+        processes = settings.BATCH_PLANNING_PROCESSES
+        if processes <= 1 or len(trips) < settings.BATCH_PLANNING_POOL_MIN_TRIPS:
+            return {}  # build_route_levels() simplifies inline
+        pool = get_planning_pool(processes)
         return {
-            'rest_stops': rest_stops,
-            'eld_logs': eld_logs,
-            'total_days': days_required,
-            'compliance_summary': {
-                'total_drive_hours': total_drive_hours,
-                'total_on_duty_hours': total_on_duty_hours,
-                'days_required': days_required,
-                'cycle_hours_used': trip.current_cycle_used_hours + total_on_duty_hours
-            }
+            index: pool.submit(simplify_in_process, trip.route_coordinates)
+            for index, trip in trips.items() if trip.route_coordinates
         }
     
-    def _generate_daily_logs(self, log_date: date, drive_hours: float, is_first_day: bool) -> List[Dict]:
-        """Generate ELD logs for a single day"""
-        logs = []
-        
-        if is_first_day:
-            # Start with current status
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'on_duty',
-                'start_time': time(6, 0),
-                'duration_hours': 1.0,  # Pre-trip inspection
-                'remarks': 'Pre-trip inspection and trip planning'
-            })
-        else:
-            # Previous day off-duty period
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'off_duty',
-                'start_time': time(0, 0),
-                'duration_hours': 10.0,
-                'remarks': 'Required 10-hour off-duty period'
-            })
-        
-        # Driving periods
-        start_hour = 7 if is_first_day else 10
-        
-        if drive_hours <= 8:
-            # Can drive continuously
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'driving',
-                'start_time': time(start_hour, 0),
-                'duration_hours': drive_hours,
-                'remarks': 'Driving to destination'
-            })
-        else:
-            # Need break after 8 hours
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'driving',
-                'start_time': time(start_hour, 0),
-                'duration_hours': 8.0,
-                'remarks': 'Driving (first 8 hours)'
-            })
-            
-            # Mandatory break
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'off_duty',
-                'start_time': time(start_hour + 8, 0),
-                'duration_hours': 0.5,
-                'remarks': 'Mandatory 30-minute break'
-            })
-            
-            # Continue driving
-            logs.append({
-                'log_date': log_date,
-                'duty_status': 'driving',
-                'start_time': time(start_hour + 8, 30),
-                'duration_hours': drive_hours - 8,
-                'remarks': 'Driving (after break)'
-            })
-        
-        return logs
+    def _driver_free_at(self, driver):
+        """When the driver is rested from their last stored log, or None if they have none"""
+        last = ELDLog.objects.filter(driver=driver).order_by('-log_date', '-start_time').values_list(
+            'log_date', 'start_time', 'duration_hours'
+        ).first()
+        if last is None:
+            return None
+        return HOSSimulator.rested_departure(timezone.localtime(DriverCycleState._log_span(*last)[1]))
     
-    def _interpolate_location(self, route_coordinates: List, progress: float) -> Dict:
-        """Find location along route at given progress (0.0 to 1.0)"""
-        if not route_coordinates or progress <= 0:
-            return {
-                'lat': route_coordinates[0][0] if route_coordinates else 0,
-                'lng': route_coordinates[0][1] if route_coordinates else 0,
-                'address': 'Route location'
-            }
+    @write_transaction()
+    def _save(self, planned: Dict[int, tuple], results: Dict):
+        planner = TripPlanningService()
+        Trip.objects.bulk_create([trip for trip, _, _, _ in planned.values()])
         
-        if progress >= 1.0:
-            return {
-                'lat': route_coordinates[-1][0],
-                'lng': route_coordinates[-1][1],
-                'address': 'Route location'
-            }
+        rest_stops, eld_logs, levels = [], [], []
+        for trip, trip_stops, trip_logs, simplified in planned.values():
+            rest_stops.extend(trip_stops)
+            eld_logs.extend(trip_logs)
+            if trip.route_coordinates:
+                levels.extend(planner.build_route_levels(trip, simplified))
         
-        # Simple interpolation
-        index = int(progress * (len(route_coordinates) - 1))
-        coord = route_coordinates[index]
+        RestStop.objects.bulk_create(rest_stops, batch_size=500)
+        ELDLog.objects.bulk_create(eld_logs, batch_size=500)
+        TripRouteLevel.objects.bulk_create(levels, batch_size=100)
+        DailyDutyTotals.apply(DailyDutyTotals.deltas_for(eld_logs))
+        DriverCycleState.record(eld_logs)
         
-        return {
-            'lat': coord[0],
-            'lng': coord[1],
-            'address': f'Mile marker {int(progress * 1000)}'
-        }
\ No newline at end of file
+        for index, (trip, _, _, _) in planned.items():
+            results[index] = {
+                'index': index,
+                'status': 'created',
+                'trip_id': trip.id,
+                'total_distance_miles': trip.total_distance_miles,
+                'total_days': trip.total_days,
+            }
@@ -0,0 +1,42 @@
+# trips/signals.py
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Driver, ELDLog, RestStop, Trip, TripRouteLevel, trip_changed
+from .instrumentation import instrument_connection
+from .payloads import publish_versions
+
+@receiver(post_save, sender=ELDLog)
+@receiver(post_save, sender=RestStop)
+@receiver(post_save, sender=TripRouteLevel)
+def bump_trip_version(sender, instance, **kwargs):
+    # Bulk inserts skip signals; their callers bump the version themselves. Deletes are
+    # handled by the models' delete() methods (see TripChildQuerySet), with no receivers,
+    # so cascades from Trip and Driver stay fast deletes.
+    Trip.bump_versions([instance.trip_id])
+
+@receiver(post_save, sender=Driver)
+def bump_driver_trip_versions(sender, instance, created, **kwargs):
+    # driver_info is part of every trip's representation
+    if not created:
+        Trip.bump_versions(Trip.objects.filter(driver=instance).values_list('id', flat=True))
+
+@receiver(post_save, sender=User)
+def bump_user_trip_versions(sender, instance, created, update_fields, **kwargs):
+    # Only the name reaches driver_info, so last_login updates on sign-in cost nothing
+    if created or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    Trip.bump_versions(Trip.objects.filter(driver__user=instance).values_list('id', flat=True))
+
+@receiver(trip_changed)
+def publish_trip_versions(sender, trip_ids, **kwargs):
+    publish_versions(trip_ids)
+
+@receiver(post_delete, sender=Trip)
+def unpublish_trip_version(sender, instance, **kwargs):
+    publish_versions([instance.pk])
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    instrument_connection(connection)
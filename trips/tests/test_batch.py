@@ -0,0 +1,57 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from trips.models import DriverCycleState, ELDLog, Trip
+
+NEW_YORK = {'lat': 40.71, 'lng': -74.01}
+ALBANY = {'lat': 42.65, 'lng': -73.76}
+SPEC = {'current_location': NEW_YORK, 'pickup_location': NEW_YORK, 'dropoff_location': ALBANY, 'current_cycle_used_hours': 0}
+ROUTE = {'coordinates': [[40.71, -74.01], [42.65, -73.76]], 'distance_miles': 200.0, 'duration_hours': 3.6, 'instructions': []}
+
+def log_spans(trip):
+    return [
+        DriverCycleState._log_span(log.log_date, log.start_time, log.duration_hours)
+        for log in trip.eld_logs.all()
+    ]
+
+@override_settings(BATCH_PLANNING_PROCESSES=1, CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'trip_payloads': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-payloads'},
+})
+@mock.patch('trips.services.RouteCalculatorService.calculate_route', return_value=ROUTE)
+class BatchPlanningTests(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, username='demo')  # get_demo_driver's user
+
+    def post(self, specs):
+        return self.client.post('/api/trips/batch/', {'trips': specs}, content_type='application/json')
+
+    def test_trips_for_one_driver_are_chained_without_overlap(self, calculate_route):
+        response = self.post([SPEC, SPEC, SPEC])
+        self.assertEqual(response.status_code, 201, response.json())
+
+        trips = list(Trip.objects.order_by('id'))
+        for earlier, later in zip(trips, trips[1:]):
+            self.assertGreaterEqual(later.planned_departure, max(end for _, end in log_spans(earlier)))
+
+        spans = sorted(span for trip in trips for span in log_spans(trip))
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            self.assertLessEqual(end, start)
+
+    def test_a_second_batch_starts_after_the_first(self, calculate_route):
+        self.post([SPEC])
+        self.post([SPEC])
+        first, second = Trip.objects.order_by('id')
+        self.assertGreater(second.planned_departure, max(end for _, end in log_spans(first)))
+
+    def test_rejects_a_planned_departure_that_overlaps(self, calculate_route):
+        departure = (timezone.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+        response = self.post([{**SPEC, 'planned_departure': departure}, {**SPEC, 'planned_departure': departure}])
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertIn('rested', results[1]['error'])
+        self.assertEqual(ELDLog.objects.values('trip').distinct().count(), 1)
@@ -0,0 +1,51 @@
+import time
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.utils import timezone
+from trips.breaker import CircuitBreaker
+from trips.clients import HostRateLimiter
+from trips.models import ProviderCircuit
+
+class LatencyBudgetTests(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30, latency_budget=0.05)
+        self.limiter = HostRateLimiter({'provider.test': 0.2})
+        self.limiter.reserve('provider.test')  # the next slot is 0.2s away
+
+    def state(self):
+        return self.breaker.status()['state']
+
+    def test_rate_limit_queue_is_not_latency(self):
+        with self.breaker.call():
+            self.limiter.wait('provider.test')
+        self.assertEqual(self.state(), 'closed')
+
+    def test_slow_calls_still_count(self):
+        with self.breaker.call():
+            time.sleep(0.1)
+        self.assertEqual(self.state(), 'open')
+
+    async def test_async_rate_limit_queue_is_not_latency(self):
+        async with self.breaker.acall():
+            await self.limiter.await_slot('provider.test')
+        self.assertEqual(await sync_to_async(self.state)(), 'closed')
+
+class OpenGeocoderTests(TestCase):
+    def setUp(self):
+        ProviderCircuit.objects.create(name='nominatim', state='open', opened_at=timezone.now())
+
+    def assertUnavailable(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_geocode(self):
+        self.assertUnavailable(self.client.post('/api/trips/geocode/', {'address': 'Albany, NY'}, content_type='application/json'))
+
+    def test_async_geocode(self):
+        self.assertUnavailable(self.client.post('/api/async/geocode/', {'address': 'Albany, NY'}, content_type='application/json'))
+
+    def test_async_plan_with_addresses(self):
+        self.assertUnavailable(self.client.post('/api/async/trips/', {
+            'current_location': 'Albany, NY', 'pickup_location': 'Albany, NY', 'dropoff_location': 'Buffalo, NY',
+            'current_cycle_used_hours': 0,
+        }, content_type='application/json'))
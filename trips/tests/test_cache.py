@@ -0,0 +1,47 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from trips import cache as cache_module
+from trips.cache import PersistentCache
+from trips.models import CacheCounter, GeocodeCacheEntry
+
+@override_settings(CACHE_STATS_FLUSH_LOOKUPS=1000, CACHE_STATS_FLUSH_INTERVAL=3600, CACHE_EVICT_INTERVAL=3600)
+class PersistentCacheTests(TestCase):
+    def setUp(self):
+        cache_module._pending.clear()
+        cache_module._last_evicted.clear()
+        self.cache = PersistentCache('test', GeocodeCacheEntry, ttl_seconds=3600, max_entries=1)
+
+    def test_lookups_do_not_write(self):
+        self.cache.set('chicago, il', {'lat': 41.88, 'lng': -87.63})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.cache.get('chicago, il'), (True, {'lat': 41.88, 'lng': -87.63}))
+            self.assertEqual(self.cache.get('nowhere'), (False, None))
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        self.assertFalse(CacheCounter.objects.exists())
+
+    def test_counts_are_flushed_in_batches(self):
+        self.cache.set('chicago, il', {'lat': 41.88, 'lng': -87.63})
+        with override_settings(CACHE_STATS_FLUSH_LOOKUPS=3):
+            self.cache.get('chicago, il')
+            self.cache.get('chicago, il')
+            self.assertFalse(CacheCounter.objects.exists())
+            self.cache.get('nowhere')
+
+        counter = CacheCounter.objects.get(name='test')
+        self.assertEqual((counter.hits, counter.misses), (2, 1))
+        self.assertEqual(GeocodeCacheEntry.objects.get().hits, 2)
+
+    def test_stats_include_pending_counts(self):
+        self.cache.get('nowhere')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 1))
+
+    def test_set_evicts_at_most_once_per_interval(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.assertEqual(GeocodeCacheEntry.objects.count(), 2)
+
+        self.cache.evict()
+        self.assertEqual(list(GeocodeCacheEntry.objects.values_list('label', flat=True)), ['b'])
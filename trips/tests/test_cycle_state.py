@@ -0,0 +1,72 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from trips.models import Driver, DriverCycleState, ELDLog, Trip
+from trips.services import TripPlanningService
+
+def day(offset):
+    return timezone.localdate() + timedelta(days=offset)
+
+class CycleStateTests(TestCase):
+    def setUp(self):
+        self.driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        DriverCycleState.for_driver(self.driver.id)
+
+    def plan(self, offset, hours=(1.0, 5.0, 5.0)):
+        """A saved plan `offset` days from today: on duty at 06:00, then driving"""
+        logs, start = [], datetime.combine(day(offset), time(6))
+        for duty_status, duration in zip(['on_duty'] + ['driving'] * (len(hours) - 1), hours):
+            logs.append(ELDLog(driver=self.driver, log_date=day(offset), duty_status=duty_status,
+                               start_time=start.time(), duration_hours=duration))
+            start += timedelta(hours=duration)
+        ELDLog.objects.bulk_create(logs)
+        DriverCycleState.record(logs)
+        return logs
+
+    def test_planned_logs_count_once_they_have_happened(self):
+        with mock.patch.object(DriverCycleState, 'rebuild') as rebuild:
+            self.plan(1)
+            self.plan(2)
+        rebuild.assert_not_called()
+
+        now = timezone.now()
+        self.assertEqual(DriverCycleState.for_driver(self.driver.id).hours_at(now), 0.0)
+
+        later = timezone.make_aware(datetime.combine(day(3), time(0)))
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            state = DriverCycleState.for_driver(self.driver.id)
+            self.assertEqual(state.hours_at(later), 22.0)
+            # Caught up and saved: the next read finds nothing new
+            self.assertFalse(state.stale)
+            self.assertEqual(DriverCycleState.objects.get(driver=self.driver).cycle_hours, 22.0)
+
+    def test_past_logs_are_recorded_directly(self):
+        self.plan(-1)
+        state = DriverCycleState.objects.get(driver=self.driver)
+        self.assertEqual(state.cycle_hours, 11.0)
+        self.assertEqual(state.hours_at(timezone.now()), 11.0)
+
+    def test_current_state_reads_in_one_query(self):
+        self.plan(-1)
+        self.plan(1)
+        with self.assertNumQueries(1):
+            state = DriverCycleState.for_driver(self.driver.id)
+        self.assertEqual(state.cycle_hours, 11.0)
+
+    def test_planned_trips_count_at_a_later_departure(self):
+        self.plan(1)
+        self.plan(2)
+        stop = {'lat': 40.7, 'lng': -74.0}
+        trip = Trip(driver=self.driver, current_location=stop, pickup_location=stop, dropoff_location=stop,
+                    current_cycle_used_hours=0,
+                    planned_departure=timezone.make_aware(datetime.combine(day(3), time(8))))
+        TripPlanningService().apply_cycle(trip)
+        self.assertEqual(trip.current_cycle_used_hours, 22.0)
+
+        trip.planned_departure = timezone.make_aware(datetime.combine(day(12), time(8)))
+        TripPlanningService().apply_cycle(trip)
+        self.assertEqual(trip.current_cycle_used_hours, 0.0)
+        # Projections leave the stored state alone
+        self.assertEqual(DriverCycleState.objects.get(driver=self.driver).cycle_hours, 0.0)
@@ -0,0 +1,58 @@
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from trips.models import DailyDutyTotals, Driver, ELDLog, Trip
+
+STOP = {'lat': 40.7, 'lng': -74.0}
+
+class DeleteTotalsTests(TestCase):
+    def setUp(self):
+        self.driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.trips = [self.create_trip(hour) for hour in (0, 12)]
+
+    def create_trip(self, first_hour):
+        trip = Trip.objects.create(
+            driver=self.driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+            current_cycle_used_hours=0
+        )
+        logs = [
+            ELDLog(trip=trip, driver=self.driver, log_date=date(2025, 1, 6), duty_status=duty_status,
+                   start_time=time(first_hour + i), duration_hours=1.0)
+            for i, duty_status in enumerate(['on_duty'] + ['driving'] * 5)
+        ]
+        ELDLog.objects.bulk_create(logs)
+        DailyDutyTotals.apply(DailyDutyTotals.deltas_for(logs))
+        return trip
+
+    def totals(self):
+        row = DailyDutyTotals.objects.get(driver=self.driver, log_date=date(2025, 1, 6))
+        return row.driving_hours, row.on_duty_hours
+
+    def test_trip_delete_subtracts_its_logs_in_bulk(self):
+        self.assertEqual(self.totals(), (10.0, 2.0))
+        with CaptureQueriesContext(connection) as queries:
+            self.trips[0].delete()
+
+        self.assertEqual(self.totals(), (5.0, 1.0))
+        self.assertEqual(ELDLog.objects.count(), 6)
+        # One DELETE for all six logs, not one per row
+        log_deletes = [q for q in queries.captured_queries if q['sql'].startswith('DELETE FROM "trips_eldlog"')]
+        self.assertEqual(len(log_deletes), 1)
+
+    def test_queryset_delete_subtracts_and_bumps_the_trip(self):
+        trip = self.trips[1]
+        trip.eld_logs.filter(duty_status='driving').delete()
+
+        self.assertEqual(self.totals(), (5.0, 2.0))
+        self.assertEqual(Trip.objects.get(pk=trip.pk).version, trip.version + 1)
+
+    def test_instance_delete(self):
+        self.trips[0].eld_logs.first().delete()
+        self.assertEqual(self.totals(), (10.0, 1.0))
+
+    def test_driver_delete_cascades(self):
+        self.driver.delete()
+        self.assertFalse(ELDLog.objects.exists())
+        self.assertFalse(DailyDutyTotals.objects.exists())
@@ -0,0 +1,32 @@
+import json
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.test import TestCase
+from trips.fields import decode_coordinates, encode_coordinates
+from trips.models import Driver, Trip
+
+ROUTE = [[40.7, -74.0], [41.8, -87.6], [34.05, -118.2]]
+
+class PackedArrayFieldTests(TestCase):
+    def setUp(self):
+        driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.trip = Trip.objects.create(
+            driver=driver, current_location={}, pickup_location={}, dropoff_location={},
+            current_cycle_used_hours=0, route_coordinates=ROUTE, route_cumulative_miles=[0.0, 711.5, 2456.25]
+        )
+
+    def test_round_trip(self):
+        self.assertEqual(decode_coordinates(encode_coordinates(ROUTE)), ROUTE)
+        trip = Trip.objects.get(pk=self.trip.pk)
+        self.assertEqual(trip.route_coordinates, ROUTE)
+        self.assertEqual(trip.route_cumulative_miles, [0.0, 711.5, 2456.25])
+
+    def test_serializes_as_json_and_loads_back(self):
+        dumped = serializers.serialize('json', Trip.objects.filter(pk=self.trip.pk))
+        fields = json.loads(dumped)[0]['fields']
+        self.assertEqual(json.loads(fields['route_coordinates']), ROUTE)
+
+        Trip.objects.all().delete()
+        for obj in serializers.deserialize('json', dumped):
+            obj.save()
+        self.assertEqual(Trip.objects.get().route_coordinates, ROUTE)
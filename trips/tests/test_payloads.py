@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from trips.models import Driver, Trip
+from trips.payloads import _publish, version_key
+from trips.tests.test_views import LOCAL_CACHES, STOP
+
+@LOCAL_CACHES
+class PublishVersionTests(TestCase):
+    def setUp(self):
+        self.cache = caches['trip_payloads']
+        self.cache.clear()
+        driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.trip = Trip.objects.create(
+            driver=driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+            current_cycle_used_hours=0
+        )
+        self.key = version_key(self.trip.id)
+
+    def test_never_lowers_a_published_version(self):
+        # A later commit's callback already published a newer version
+        self.cache.set(self.key, self.trip.version + 1)
+        _publish({self.trip.id})
+        self.assertEqual(self.cache.get(self.key), self.trip.version + 1)
+
+    def test_raises_an_older_version(self):
+        self.cache.set(self.key, self.trip.version - 1)
+        _publish({self.trip.id})
+        self.assertEqual(self.cache.get(self.key), self.trip.version)
+
+    def test_forgets_deleted_trips(self):
+        self.cache.set(self.key, self.trip.version)
+        Trip.objects.filter(pk=self.trip.pk).delete()
+        _publish({self.trip.id})
+        self.assertIsNone(self.cache.get(self.key))
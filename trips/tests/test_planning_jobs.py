@@ -0,0 +1,57 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from trips.models import Driver, PlanningJob, Trip
+from trips.services import TripPlanningService
+
+STOP = {'lat': 40.7, 'lng': -74.0}
+
+class PlanningJobLeaseTests(TestCase):
+    def setUp(self):
+        driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.planner = TripPlanningService()
+        self.trips = [
+            Trip.objects.create(
+                driver=driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+                current_cycle_used_hours=0
+            )
+            for _ in range(3)
+        ]
+
+    def running_job(self, trip, attempts, lease_expires_at):
+        return PlanningJob.objects.create(
+            trip=trip, status='running', attempts=attempts,
+            started_at=timezone.now() - timedelta(minutes=10), lease_expires_at=lease_expires_at
+        )
+
+    def test_claim_takes_a_lease(self):
+        self.planner.enqueue(self.trips[0])
+        job = self.planner.claim_next_job(timedelta(seconds=30))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('running', 1))
+        self.assertGreater(job.lease_expires_at, timezone.now() + timedelta(seconds=20))
+
+    def test_only_expired_leases_are_requeued(self):
+        now = timezone.now()
+        live = self.running_job(self.trips[0], 1, now + timedelta(seconds=30))
+        expired = self.running_job(self.trips[1], 1, now - timedelta(seconds=1))
+        exhausted = self.running_job(self.trips[2], 3, now - timedelta(seconds=1))
+
+        self.assertEqual(self.planner.requeue_stale_jobs(max_attempts=3), (1, 1))
+
+        statuses = dict(PlanningJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {live.id: 'running', expired.id: 'queued', exhausted.id: 'failed'})
+
+    def test_attempt_that_lost_its_lease_does_not_record_its_outcome(self):
+        self.planner.enqueue(self.trips[0])
+        job = self.planner.claim_next_job()
+
+        def requeued_meanwhile(trip, route_data=None):
+            PlanningJob.objects.filter(pk=job.pk).update(status='queued', lease_expires_at=None)
+
+        with mock.patch.object(TripPlanningService, 'plan_trip', side_effect=requeued_meanwhile):
+            job = self.planner.run_job(job)
+        self.assertEqual(job.status, 'queued')
@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import skipIf
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+from trips.renderers import ORJSONRenderer, orjson
+
+@skipIf(orjson is None, "orjson is not installed")
+class ORJSONRendererTests(SimpleTestCase):
+    def render(self, data):
+        return ORJSONRenderer().render(data), JSONRenderer().render(data)
+
+    def test_matches_the_stock_renderer(self):
+        data = {
+            'id': 1, 'miles': 12.5, 'name': 'Café\u2028', 'when': datetime(2025, 1, 6, 8, tzinfo=timezone.utc),
+            'hours': Decimal('1.50'), 'stops': [None, True, [40.7, -74.0]],
+        }
+        ours, stock = self.render(data)
+        self.assertEqual(ours, stock)
+
+    def test_known_differences(self):
+        # Same values, different spelling of exponents
+        ours, stock = self.render({'big': 1e20, 'small': 1e-7})
+        self.assertEqual(ours, b'{"big":1e20,"small":1e-7}')
+        self.assertEqual(stock, b'{"big":1e+20,"small":1e-07}')
+        self.assertEqual(json.loads(ours), json.loads(stock))
+
+        # Not valid JSON for the stock renderer at all
+        self.assertEqual(ORJSONRenderer().render({'miles': float('nan')}), b'{"miles":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'miles': float('nan')})
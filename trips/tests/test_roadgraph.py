@@ -0,0 +1,98 @@
+import heapq
+import math
+from pathlib import Path
+from django.test import SimpleTestCase, override_settings
+from trips import roadgraph
+from trips.roadgraph import RoadGraph, get_road_graph, parse_maxspeed
+
+SAMPLE = Path(roadgraph.__file__).parent / 'data' / 'us_interstates_sample.geojson'
+NEW_YORK = {'lat': 40.7128, 'lng': -74.0060}
+CHICAGO = {'lat': 41.8781, 'lng': -87.6298}
+LOS_ANGELES = {'lat': 34.0522, 'lng': -118.2437}
+
+def line(coordinates, **properties):
+    return {'type': 'Feature', 'properties': {'highway': 'primary', **properties},
+            'geometry': {'type': 'LineString', 'coordinates': coordinates}}
+
+def dijkstra(graph, source, target):
+    """Plain Dijkstra over the CSR arrays, to check A* against"""
+    best, heap = {source: 0.0}, [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node == target:
+            return cost
+        if cost > best[node]:
+            continue
+        for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+            neighbour, new_cost = int(graph.targets[edge]), cost + float(graph.hours[edge])
+            if new_cost < best.get(neighbour, math.inf):
+                best[neighbour] = new_cost
+                heapq.heappush(heap, (new_cost, neighbour))
+    return None
+
+class RoadGraphTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.graph = RoadGraph.load(str(SAMPLE))
+
+    def test_csr_layout(self):
+        graph = self.graph
+        self.assertEqual(len(graph.offsets), graph.node_count + 1)
+        self.assertEqual(graph.offsets[-1], graph.edge_count)
+        self.assertTrue((graph.miles > 0).all())
+        self.assertLessEqual(graph.max_speed, roadgraph.HGV_MAX_SPEED_MPH + 1e-3)
+
+    def test_a_star_matches_dijkstra(self):
+        graph = self.graph
+        for source, target in [(0, graph.node_count - 1), (3, 40), (graph.node_count // 2, 1)]:
+            path = graph.shortest_path(source, target)
+            expected = dijkstra(graph, source, target)
+            if expected is None:
+                self.assertIsNone(path)
+                continue
+            self.assertAlmostEqual(float(graph.hours[path].sum()), expected, places=4)
+            # The edges chain from source to target
+            node = source
+            for edge in path:
+                self.assertTrue(graph.offsets[node] <= edge < graph.offsets[node + 1])
+                node = int(graph.targets[edge])
+            self.assertEqual(node, target)
+
+    def test_snaps_stops_to_the_nearest_node(self):
+        node, miles = self.graph.nearest_node(CHICAGO['lat'] + 0.01, CHICAGO['lng'])
+        self.assertLess(miles, 1.0)
+        self.assertAlmostEqual(float(self.graph.lat[node]), CHICAGO['lat'], places=3)
+
+    def test_routes_across_the_sample(self):
+        route = self.graph.route([NEW_YORK, CHICAGO, LOS_ANGELES], max_snap_miles=30)
+        self.assertIsNotNone(route)
+        self.assertEqual(route['coordinates'][0], [NEW_YORK['lat'], NEW_YORK['lng']])
+        self.assertEqual(route['coordinates'][-1], [LOS_ANGELES['lat'], LOS_ANGELES['lng']])
+        self.assertTrue(2400 < route['distance_miles'] < 3200, route['distance_miles'])
+        # No faster than the HGV cap allows
+        self.assertGreaterEqual(route['duration_hours'], route['distance_miles'] / roadgraph.HGV_MAX_SPEED_MPH - 1e-3)
+
+    def test_stops_off_the_graph_are_not_covered(self):
+        mid_atlantic = {'lat': 35.0, 'lng': -50.0}
+        self.assertIsNone(self.graph.route([NEW_YORK, CHICAGO, mid_atlantic], max_snap_miles=30))
+
+    def test_oneway_and_excluded_ways(self):
+        graph = RoadGraph.from_geojson({'features': [
+            line([[0, 0], [0, 1]], oneway='yes'),
+            line([[0, 1], [0, 2]], highway='footway'),
+            line([[0, 1], [0, 3]], hgv='no'),
+        ]})
+        self.assertEqual(graph.node_count, 2)
+        self.assertIsNotNone(graph.shortest_path(0, 1))
+        self.assertIsNone(graph.shortest_path(1, 0))
+
+    def test_parse_maxspeed(self):
+        self.assertEqual(parse_maxspeed('55 mph', 'primary'), 55)
+        self.assertAlmostEqual(parse_maxspeed('100', 'primary'), 62.1371)
+        self.assertEqual(parse_maxspeed(None, 'motorway'), 65)
+        self.assertEqual(parse_maxspeed('signals', 'residential'), 25)
+
+    def test_no_graph_unless_configured(self):
+        with override_settings(ROAD_GRAPH_PATH=''):
+            self.assertIsNone(get_road_graph())
@@ -0,0 +1,65 @@
+from unittest import mock
+import httpx
+from django.test import TestCase, override_settings
+from openrouteservice.directions import directions
+from openrouteservice.exceptions import ApiError
+from trips.clients import SingleAttemptClient, async_http_client, provider_timeout
+from trips.services import RouteCalculatorService
+
+NEW_YORK = {'lat': 40.71, 'lng': -74.01}
+ALBANY = {'lat': 42.65, 'lng': -73.76}
+# ORS directions in GeoJSON, as both the openrouteservice client and the HTTP API return it:
+# one segment per leg, distances in the requested miles, durations in seconds
+GEOJSON = {
+    'features': [{
+        'geometry': {'coordinates': [[-74.01, 40.71, 10.0], [-73.76, 42.65, 20.0]]},
+        'properties': {
+            'summary': {'distance': 150.0, 'duration': 9000.0},
+            'segments': [
+                {'distance': 0.0, 'duration': 0.0, 'steps': [{'instruction': 'Arrive at pickup', 'distance': 0.0}]},
+                {'distance': 150.0, 'duration': 9000.0, 'steps': [
+                    {'instruction': 'Head north', 'distance': 1.0},
+                    {'instruction': 'Keep left onto I-87 N', 'distance': 149.0},
+                ]},
+            ],
+        },
+    }],
+}
+
+@override_settings(ROUTING_PRIMARY='ors')
+class ProviderRouteTests(TestCase):
+    def test_sync_route_takes_the_parsed_response(self):
+        with mock.patch('trips.services.directions', return_value=GEOJSON):
+            route = RouteCalculatorService().calculate_route(NEW_YORK, NEW_YORK, ALBANY)
+        self.assertEqual(route['coordinates'], [[40.71, -74.01], [42.65, -73.76]])
+        self.assertEqual(route['distance_miles'], 150.0)
+        self.assertEqual(route['duration_hours'], 2.5)
+        self.assertEqual(route['instructions'], [
+            'Arrive at pickup (0.0 miles)', 'Head north (1.0 miles)', 'Keep left onto I-87 N (149.0 miles)'
+        ])
+
+    async def test_async_route_uses_the_given_client(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=GEOJSON))
+        async with httpx.AsyncClient(transport=transport) as client:
+            route = await RouteCalculatorService().acalculate_route(NEW_YORK, NEW_YORK, ALBANY, client)
+        self.assertEqual((route['distance_miles'], route['duration_hours']), (150.0, 2.5))
+
+class AsyncHTTPClientTests(TestCase):
+    async def test_closes_with_the_request(self):
+        async with async_http_client() as client:
+            pass
+        self.assertTrue(client.is_closed)
+
+class ORSClientTests(TestCase):
+    def test_does_not_retry_server_errors(self):
+        client = SingleAttemptClient(key='test')
+        client._session = mock.Mock()
+        client._session.post.return_value = mock.Mock(status_code=503)
+        with self.assertRaises(ApiError):
+            directions(client=client, coordinates=[(-74.01, 40.71), (-73.76, 42.65)], profile='driving-hgv', format='geojson')
+        self.assertEqual(client._session.post.call_count, 1)
+
+    @override_settings(CIRCUIT_BREAKERS={'ors': {'failure_threshold': 3, 'reset_timeout': 30, 'latency_budget': 5}})
+    def test_timeout_fits_the_latency_budget(self):
+        self.assertEqual(provider_timeout('ors', 10), 5)
+        self.assertEqual(provider_timeout('ors', 2), 2)
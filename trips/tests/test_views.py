@@ -0,0 +1,136 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from trips.models import Driver, Trip, TripRouteLevel
+from trips.views import ROUTE_DETAIL_ZOOMS
+
+STOP = {'lat': 40.7, 'lng': -74.0}
+# Keep rendered payloads out of the on-disk cache the dev server reads
+LOCAL_CACHES = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'trip_payloads': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-payloads'},
+})
+
+@LOCAL_CACHES
+class TripListTests(TestCase):
+    def setUp(self):
+        driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.trip = Trip.objects.create(
+            driver=driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+            current_cycle_used_hours=0
+        )
+
+    def test_filters_by_driver(self):
+        response = self.client.get('/api/trips/', {'driver': self.trip.driver_id})
+        self.assertEqual([trip['id'] for trip in response.json()['results']], [self.trip.id])
+
+    def test_rejects_a_non_numeric_driver(self):
+        response = self.client.get('/api/trips/', {'driver': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('driver', response.json())
+
+@LOCAL_CACHES
+class RouteDetailTests(TestCase):
+    def setUp(self):
+        driver = Driver.objects.create(user=User.objects.create(username='driver'), license_number='D1')
+        self.trip = Trip.objects.create(
+            driver=driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+            current_cycle_used_hours=0, route_coordinates=[[40.7, -74.0], [41.8, -87.6]]
+        )
+
+    def test_accepts_the_configured_levels(self):
+        for detail in ('full', 'low', 'medium', 'high'):
+            response = self.client.get(f'/api/trips/{self.trip.id}/', {'detail': detail})
+            self.assertEqual(response.status_code, 200, detail)
+
+    def test_rejects_unknown_levels(self):
+        response = self.client.get(f'/api/trips/{self.trip.id}/', {'detail': 'ultra'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_zoom_map_follows_the_settings(self):
+        self.assertEqual(ROUTE_DETAIL_ZOOMS, [(6, 'low'), (10, 'medium'), (13, 'high')])
+
+    @override_settings(ROUTE_DETAIL_LEVELS={'street': {'tolerance_miles': 0.001, 'max_zoom': 16}})
+    def test_level_choices_follow_the_settings(self):
+        TripRouteLevel(
+            trip=self.trip, level='street', tolerance_miles=0.001, point_count=2, coordinates=[[40.7, -74.0], [41.8, -87.6]]
+        ).full_clean()
+
+@LOCAL_CACHES
+class TripETagTests(TestCase):
+    def setUp(self):
+        caches['trip_payloads'].clear()
+        self.user = User.objects.create(username='driver', first_name='Ann')
+        self.driver = Driver.objects.create(user=self.user, license_number='D1')
+        self.trip = Trip.objects.create(
+            driver=self.driver, current_location=STOP, pickup_location=STOP, dropoff_location=STOP,
+            current_cycle_used_hours=0, route_coordinates=[[40.7, -74.0], [41.8, -87.6]]
+        )
+        self.url = f'/api/trips/{self.trip.id}/'
+
+    def test_route_format_has_its_own_etag(self):
+        plain = self.client.get(self.url)
+        packed = self.client.get(self.url, {'route_format': 'packed'})
+        self.assertNotEqual(plain['ETag'], packed['ETag'])
+        response = self.client.get(self.url, {'route_format': 'packed'}, HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_packed_payload_is_cached_apart(self):
+        packed = self.client.get(self.url, {'route_format': 'packed'}).json()
+        self.assertIsInstance(packed['route_coordinates'], str)
+        plain = self.client.get(self.url).json()
+        self.assertEqual(plain['route_coordinates'], [[40.7, -74.0], [41.8, -87.6]])
+
+    @override_settings(TRIP_PAYLOAD_CACHE_GZIP=True)
+    def test_gzipped_copy_has_its_own_etag(self):
+        identity = self.client.get(self.url)  # builds and stores the payload
+        gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertNotEqual(gzipped['ETag'], identity['ETag'])
+
+        for etag in (identity['ETag'], gzipped['ETag']):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+        plain = self.client.get(self.url, HTTP_IF_NONE_MATCH=gzipped['ETag'])
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_driver_changes_bump_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.driver.license_number = 'D2'
+            self.driver.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['driver_info']['license_number'], 'D2')
+
+    def test_user_name_changes_bump_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Bea'
+            self.user.save(update_fields=['first_name'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['driver_info']['full_name'], 'Bea')
+
+@LOCAL_CACHES
+class PlannedDepartureTests(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, username='demo')  # get_demo_driver's user
+
+    def test_start_keeps_the_planned_departure(self):
+        response = self.client.post('/api/trips/', {
+            'current_location': STOP, 'pickup_location': STOP, 'dropoff_location': STOP,
+            'current_cycle_used_hours': 0, 'planned_departure': '2025-01-06T08:00:00Z',
+        }, content_type='application/json')
+        trip_id = response.json()['trip_id']
+
+        self.assertEqual(self.client.post(f'/api/trips/{trip_id}/start_trip/').status_code, 200)
+        trip = Trip.objects.get(pk=trip_id)
+        self.assertEqual(trip.planned_departure.isoformat(), '2025-01-06T08:00:00+00:00')
+        self.assertGreater(trip.trip_start_time, trip.planned_departure)
@@ -1,13 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TripViewSet
+from .views import TripViewSet, PlanningJobViewSet, ELDLogViewSet, async_geocode, async_plan_trip
 
 router = DefaultRouter()
 router.register(r'trips', TripViewSet)
-# router.register(r'logs', ELDLogViewSet)
+router.register(r'jobs', PlanningJobViewSet)
+router.register(r'logs', ELDLogViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/geocode/', async_geocode, name='async-geocode'),
+    path('api/async/trips/', async_plan_trip, name='async-trip-plan'),
     path('api/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,87 +1,257 @@
 # trips/views.py
+import asyncio
+from io import BytesIO
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ParseError, ValidationError
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.utils import timezone
-from .models import Trip, Driver, ELDLog, RestStop
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .models import Trip, Driver, ELDLog, PlanningJob
 from .serializers import (
     TripSerializer, TripCreateSerializer, ELDLogSerializer,
-    ELDLogCreateSerializer
+    ELDLogCreateSerializer, PlanningJobSerializer, TripSummarySerializer
 )
-from .services import RouteCalculatorService, ELDComplianceService
-from re import fullmatch
+from .breaker import CircuitOpen
+from .clients import async_http_client
+from .exports import CONTENT_TYPES, EXPORT_FORMATS, export_lines, export_rows
+from .pagination import TripCursorPagination
+from .payloads import cached_version, get_payload, set_payload
+from .renderers import ORJSONParser, ORJSONRenderer
+from .services import BatchPlanningService, RouteCalculatorService, TripPlanningService
+from re import IGNORECASE, compile as re_compile, fullmatch
+
+def get_demo_driver(current_cycle_hours):
+    driver, created = Driver.objects.get_or_create(
+        id=1,
+        defaults={
+            'user_id': 1,
+            'license_number': 'DEMO123',
+            'current_cycle_hours': current_cycle_hours
+        }
+    )
+    return driver
+
+ADDRESS_PATTERN = r"^[A-Za-z0-9 !@#()_+-\[\]{}'\"\\|,./?~]+$"
+ACCEPTS_GZIP = re_compile(r'\bgzip\b', IGNORECASE)
+ROUTE_DETAIL_CHOICES = ('full', *settings.ROUTE_DETAIL_LEVELS)
+# (highest web-map zoom, detail level) in ascending zoom order; above the last is 'full'
+ROUTE_DETAIL_ZOOMS = sorted((options['max_zoom'], level) for level, options in settings.ROUTE_DETAIL_LEVELS.items())
+
+class ProviderUnavailable(APIException):
+    """503 while a provider without a fallback has its circuit breaker open"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The geocoding provider is unavailable; try again shortly.'
+    default_code = 'provider_unavailable'
+    
+    def __init__(self, circuit: CircuitOpen):
+        super().__init__()
+        self.wait = circuit.retry_after  # DRF's exception handler sends it as Retry-After
 
 class TripViewSet(viewsets.ModelViewSet):
     queryset = Trip.objects.all().select_related('driver__user').prefetch_related('rest_stops', 'eld_logs')
     serializer_class = TripSerializer
     log_serializer_class = ELDLogSerializer
+    pagination_class = TripCursorPagination
+    
+    def get_queryset(self):
+        if self.action != 'list':
+            queryset = super().get_queryset().defer('route_cumulative_miles')
+            if self.action == 'retrieve' and self.get_route_detail() != 'full':
+                queryset = queryset.defer('route_coordinates')
+            return queryset
+        
+        queryset = Trip.objects.only(*TripSummarySerializer.Meta.fields)
+        driver = self.request.query_params.get('driver')
+        if driver:
+            if not driver.isdigit():
+                raise ValidationError({'driver': 'Must be a driver id'})
+            queryset = queryset.filter(driver_id=driver)
+        trip_status = self.request.query_params.get('status')
+        if trip_status:
+            queryset = queryset.filter(status=trip_status)
+        return queryset
+    
+    def get_route_detail(self):
+        """Route detail level from ?detail=full|high|medium|low or a map ?zoom= level"""
+        detail = self.request.query_params.get('detail')
+        if detail:
+            if detail not in ROUTE_DETAIL_CHOICES:
+                raise ValidationError({'detail': f"Choose one of {', '.join(ROUTE_DETAIL_CHOICES)}"})
+            return detail
+        
+        zoom = self.request.query_params.get('zoom')
+        if zoom:
+            try:
+                zoom = float(zoom)
+            except ValueError:
+                raise ValidationError({'zoom': 'Must be a number'})
+            for max_zoom, level in ROUTE_DETAIL_ZOOMS:
+                if zoom <= max_zoom:
+                    return level
+        return 'full'
+    
+    def get_variant(self):
+        """ETag and payload cache variant of the trip detail: route detail level and route format"""
+        variant = self.get_route_detail()
+        if self.request.query_params.get('route_format') == 'packed':
+            variant += '-packed'
+        return variant
+    
+    def cached_response(self, variant: str):
+        """(response or None, version) for the requested trip: a 304 or the cached rendered JSON,
+        answered without queries while the trip's version is published in the payload cache"""
+        trip_id = self.kwargs['pk']
+        version = cached_version(trip_id)
+        if version is None:
+            return None, None  # the regular path answers 404
+        trip_id = int(trip_id)
+        
+        etag = Trip.etag_for(trip_id, version, variant)
+        # The gzipped copy is a different representation with its own ETag
+        gzip_etag = Trip.etag_for(trip_id, version, f'{variant}-gz')
+        accept_gzip = bool(ACCEPTS_GZIP.search(self.request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        if accept_gzip and gzip_etag in parse_etags(self.request.META.get('HTTP_IF_NONE_MATCH', '')):
+            etag = gzip_etag
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None and self.request.accepted_renderer.format == 'json':
+            payload = get_payload(trip_id, version, variant, accept_gzip)
+            if payload is not None:
+                body, gzipped = payload
+                response = HttpResponse(body, content_type=self.request.accepted_renderer.media_type)
+                if gzipped:
+                    response['Content-Encoding'] = 'gzip'
+                    etag = gzip_etag
+        if response is not None:
+            self.add_cache_headers(response, etag)
+        return response, version
+    
+    def cache_response(self, response, variant: str, version):
+        """Tag a freshly built response and store its rendered JSON under the version read up front
+        
+        That version was read before the rows, so the body is never older than its key or ETag.
+        """
+        if version is None or response.status_code != status.HTTP_200_OK:
+            return response
+        trip_id = int(self.kwargs['pk'])
+        self.add_cache_headers(response, Trip.etag_for(trip_id, version, variant))
+        
+        def store(rendered):
+            if rendered.accepted_renderer.format == 'json':
+                set_payload(trip_id, version, variant, rendered.content)
+        response.add_post_render_callback(store)
+        return response
+    
+    def add_cache_headers(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept-Encoding'])
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Trip detail; conditional and cached reads are answered before loading anything"""
+        variant = self.get_variant()
+        cached, version = self.cached_response(variant)
+        if cached is not None:
+            return cached
+        return self.cache_response(super().retrieve(request, *args, **kwargs), variant, version)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'retrieve':
+            context['route_detail'] = self.get_route_detail()
+        return context
     
     def get_serializer_class(self):
         if self.action == 'create':
             return TripCreateSerializer
+        if self.action == 'list':
+            return TripSummarySerializer
         return TripSerializer
     
     def create(self, request):
-        """Create a new trip and calculate route with ELD compliance"""
+        """Accept a trip and queue its route and ELD compliance planning"""
         serializer = TripCreateSerializer(data=request.data)
         if serializer.is_valid():
-            driver, created = Driver.objects.get_or_create(
-                id=1,
-                defaults={
-                    'user_id': 1,
-                    'license_number': 'DEMO123',
-                    'current_cycle_hours': serializer.validated_data['current_cycle_used_hours']
-                }
-            )
+            driver = get_demo_driver(serializer.validated_data['current_cycle_used_hours'])
             
-            trip = serializer.save(driver=driver)
+            with transaction.atomic():
+                trip = serializer.save(driver=driver)
+                job = TripPlanningService().enqueue(trip)
             
-            try:
-                route_service = RouteCalculatorService()
-                eld_service = ELDComplianceService()
-                
-                route_data = route_service.calculate_route(
-                    current_location=trip.current_location,
-                    pickup_location=trip.pickup_location,
-                    dropoff_location=trip.dropoff_location
-                )
-                
-                trip.route_coordinates = route_data['coordinates']
-                trip.total_distance_miles = route_data['distance_miles']
-                trip.estimated_drive_time_hours = route_data['duration_hours']
-                trip.save()
-                
-                compliance_plan = eld_service.generate_compliance_plan(trip)
-                
-                for stop_data in compliance_plan['rest_stops']:
-                    RestStop.objects.create(trip=trip, **stop_data)
-                
-                for log_data in compliance_plan['eld_logs']:
-                    ELDLog.objects.create(trip=trip, driver=driver, **log_data)
-                
-                return Response(TripSerializer(trip).data, status=status.HTTP_201_CREATED)
-                
-            except Exception as e:
-                return Response(
-                    {'error': f'Route calculation failed: {str(e)}'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            return Response(
+                {
+                    'job_id': job.id,
+                    'trip_id': trip.id,
+                    'status': job.status,
+                    'status_url': reverse('planningjob-detail', args=[job.id], request=request),
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Plan a list of trips at once; answers with a result per item, in request order"""
+        specs = request.data.get('trips') if isinstance(request.data, dict) else request.data
+        if not isinstance(specs, list) or not specs:
+            return Response({'error': 'Expected a non-empty list of trips'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(specs) > settings.BATCH_PLANNING_MAX_TRIPS:
+            return Response(
+                {'error': f'At most {settings.BATCH_PLANNING_MAX_TRIPS} trips per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = {}
+        valid_specs = {}
+        for index, spec in enumerate(specs):
+            serializer = TripCreateSerializer(data=spec)
+            if serializer.is_valid():
+                valid_specs[index] = serializer.validated_data
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+        
+        if valid_specs:
+            first_spec = next(iter(valid_specs.values()))
+            driver = get_demo_driver(first_spec['current_cycle_used_hours'])
+            results.update(BatchPlanningService().plan_batch(driver, valid_specs))
+        
+        created = sum(1 for result in results.values() if result['status'] == 'created')
+        return Response(
+            {
+                'created': created,
+                'failed': len(specs) - created,
+                'results': [results[index] for index in range(len(specs))],
+            },
+            status=status.HTTP_201_CREATED if created == len(specs) else status.HTTP_207_MULTI_STATUS
+        )
+    
     @action(detail=True, methods=['get'])
     def eld_logs(self, request, pk=None):
+        cached, version = self.cached_response('eld_logs')
+        if cached is not None:
+            return cached
         trip = self.get_object()
         logs = trip.eld_logs.all()
         serializer = ELDLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        return self.cache_response(Response(serializer.data), 'eld_logs', version)
     
     @action(detail=True, methods=['post'])
     def start_trip(self, request, pk=None):
         trip = self.get_object()
         trip.status = 'active'
         trip.trip_start_time = timezone.now()
-        trip.save()
+        trip.save(update_fields=['status', 'trip_start_time'])
         
         return Response({'status': 'Trip started successfully'})
     
@@ -92,7 +262,7 @@ class TripViewSet(viewsets.ModelViewSet):
             return Response({"status": "Cannot complete a cancelled trip"}, status=status.HTTP_403_FORBIDDEN)
         trip.status = 'completed'
         trip.trip_end_time = timezone.now()
-        trip.save()
+        trip.save(update_fields=['status', 'trip_end_time'])
         
         return Response({'status': 'Trip started successfully'})
     
@@ -103,7 +273,7 @@ class TripViewSet(viewsets.ModelViewSet):
             return Response({"status": "Cannot cancel trip"}, status=status.HTTP_403_FORBIDDEN)
         trip.status = 'cancelled'
         trip.trip_end_time = timezone.now()
-        trip.save()
+        trip.save(update_fields=['status', 'trip_end_time'])
         
         return Response({'status': 'Trip cancelled successfully'})
     
@@ -130,11 +300,149 @@ class TripViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def geocode(self, request):
         address = request.data['address']
-        if fullmatch(r"^[A-Za-z0-9 !@#()_+-\[\]{}'\"\\|,./?~]+$", address):
+        if fullmatch(ADDRESS_PATTERN, address):
             route_service = RouteCalculatorService()
-            geocode = route_service.geocode_address(address)
-            print(geocode)
+            try:
+                geocode = route_service.geocode_address(address)
+            except CircuitOpen as e:
+                raise ProviderUnavailable(e)
             return Response({'results': geocode})
         return Response({'status': "Address not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    
\ No newline at end of file
+class PlanningJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of queued trip plans; the trip detail is complete once status is 'done'"""
+    queryset = PlanningJob.objects.all()
+    serializer_class = PlanningJobSerializer
+
+class ELDLogViewSet(viewsets.GenericViewSet):
+    queryset = ELDLog.objects.all()
+    serializer_class = ELDLogSerializer
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream logs as NDJSON or CSV: ?driver=<id> (repeatable), ?start=, ?end= (YYYY-MM-DD), ?output=ndjson|csv"""
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Choose one of {', '.join(EXPORT_FORMATS)}"})
+        
+        driver_ids = request.query_params.getlist('driver')
+        if not all(driver_id.isdigit() for driver_id in driver_ids):
+            raise ValidationError({'driver': 'Must be a driver id'})
+        
+        dates = {}
+        for param in ('start', 'end'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    dates[param] = parse_date(value)
+                except ValueError:
+                    dates[param] = None
+                if dates[param] is None:
+                    raise ValidationError({param: 'Use YYYY-MM-DD'})
+        
+        rows = export_rows(driver_ids, dates.get('start'), dates.get('end'))
+        response = StreamingHttpResponse(export_lines(export_format, rows), content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="eld_logs.{export_format}"'
+        return response
+
+# Async views: plain Django, since DRF views are sync-only. Under an ASGI server a request
+# waiting on Nominatim or ORS holds no thread; database work runs through sync_to_async.
+
+LOCATION_FIELDS = ('current_location', 'pickup_location', 'dropoff_location')
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(ORJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+def provider_unavailable(circuit: CircuitOpen):
+    """ProviderUnavailable's response, for the plain Django views"""
+    error = ProviderUnavailable(circuit)
+    response = json_response({'detail': error.detail}, error.status_code)
+    response['Retry-After'] = '%d' % error.wait
+    return response
+
+def parse_json_body(request) -> dict:
+    data = ORJSONParser().parse(BytesIO(request.body), parser_context={'encoding': request.encoding or settings.DEFAULT_CHARSET})
+    if not isinstance(data, dict):
+        raise ParseError('Expected a JSON object')
+    return data
+
+def is_coordinates(location) -> bool:
+    return (
+        isinstance(location, dict)
+        and all(isinstance(location.get(key), (int, float)) for key in ('lat', 'lng'))
+    )
+
+def create_planned_trip(serializer, route_data):
+    """Plan an unsaved trip; plan_trip() inserts it together with its plan, or not at all"""
+    driver = get_demo_driver(serializer.validated_data['current_cycle_used_hours'])
+    trip = Trip(driver=driver, **serializer.validated_data)
+    TripPlanningService().plan_trip(trip, route_data)
+    return trip
+
+@csrf_exempt
+@require_POST
+async def async_geocode(request):
+    """Async counterpart of TripViewSet.geocode"""
+    try:
+        address = parse_json_body(request).get('address')
+    except ParseError as e:
+        return json_response({'error': str(e.detail)}, status.HTTP_400_BAD_REQUEST)
+    
+    if isinstance(address, str) and fullmatch(ADDRESS_PATTERN, address):
+        try:
+            async with async_http_client() as client:
+                geocode = await RouteCalculatorService().ageocode_address(address, client)
+        except CircuitOpen as e:
+            return provider_unavailable(e)
+        return json_response({'results': geocode})
+    return json_response({'status': "Address not found"}, status.HTTP_404_NOT_FOUND)
+
+@csrf_exempt
+@require_POST
+async def async_plan_trip(request):
+    """Create and plan a trip within the request, answering with the planned trip
+    
+    Locations may be {'lat', 'lng'} objects or address strings; addresses are geocoded concurrently.
+    """
+    try:
+        data = parse_json_body(request)
+    except ParseError as e:
+        return json_response({'error': str(e.detail)}, status.HTTP_400_BAD_REQUEST)
+    
+    route_service = RouteCalculatorService()
+    # Geocoding and routing share one keep-alive client, closed with the request
+    async with async_http_client() as client:
+        addresses = {field: data[field] for field in LOCATION_FIELDS if isinstance(data.get(field), str)}
+        if addresses:
+            found = await asyncio.gather(
+                *(route_service.ageocode_address(address, client) for address in addresses.values()),
+                return_exceptions=True  # let every lookup finish before the client closes
+            )
+            for result in found:
+                if isinstance(result, CircuitOpen):
+                    return provider_unavailable(result)
+                if isinstance(result, BaseException):
+                    raise result
+            data = {**data, **dict(zip(addresses, found))}
+        
+        errors = {
+            field: ['Address not found' if field in addresses else 'Expected an address or {"lat": ..., "lng": ...}']
+            for field in LOCATION_FIELDS if not is_coordinates(data.get(field))
+        }
+        if errors:
+            return json_response(errors, status.HTTP_400_BAD_REQUEST)
+        
+        serializer = TripCreateSerializer(data=data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        
+        route_data = await route_service.acalculate_route(
+            *(serializer.validated_data[field] for field in LOCATION_FIELDS), client
+        )
+    try:
+        trip = await sync_to_async(create_planned_trip)(serializer, route_data)
+    except DjangoValidationError as e:
+        return json_response({'error': ' '.join(e.messages)}, status.HTTP_400_BAD_REQUEST)
+    
+    trip_data = await sync_to_async(lambda: TripSerializer(trip).data)()
+    return json_response(trip_data, status.HTTP_201_CREATED)